@@ -0,0 +1,246 @@
+import collections
+import random
+import time
+import bitassign
+import clausedb
+import ga
+import gwsat
+import localsearch
+import vectorized
+import wwalksat
+from population import Population
+
+
+# Event yielded by AnytimeSolver.run:
+#     - elapsed: seconds since the run started
+#     - steps: flips (local search) or generations (GA) done so far
+#     - best: best value so far, see the `best_value` of every solver
+#     - rate: steps per second
+#     - finished: True on the last event of the run
+Progress = collections.namedtuple("Progress", ["elapsed", "steps", "best", "rate", "finished"])
+
+
+class AnytimeSolver:
+    """
+    AnytimeSolver(seed=None)
+
+    Base of the solvers that run under a budget instead of a fixed number of
+    steps. Subclasses implement step() (one flip or one generation, returns
+    True once the formula is solved), best_value() and best(). run() drives
+    the steps and yields Progress events; the caller may stop iterating at
+    any moment and ask best() for the best assignment found so far
+    """
+
+    def __init__(self, seed=None):
+        self.rng = random.Random(seed)
+        self.steps = 0
+
+    def step(self):
+        raise NotImplementedError
+
+    def best_value(self):
+        raise NotImplementedError
+
+    def best(self):
+        raise NotImplementedError
+
+    def progress(self, start, finished=False):
+        elapsed = time.perf_counter() - start
+        return Progress(elapsed, self.steps, self.best_value(), self.steps / elapsed if elapsed > 0 else 0.0,
+                        finished)
+
+    def run(self, time_budget=None, step_budget=None, sample_every=1000, sample_seconds=None):
+        """
+        run(time_budget, step_budget, sample_every, sample_seconds) -> generator of Progress
+
+        Steps until the formula is solved, `time_budget` seconds have passed
+        or `step_budget` steps were done (runs forever without budgets). An
+        event is yielded every `sample_every` steps, or every `sample_seconds`
+        seconds if given, and a last one with finished=True when the run ends.
+        A solver can be run again to continue the search with a new budget
+        """
+        start = time.perf_counter()
+        deadline = None if time_budget is None else start + time_budget
+        last_step = None if step_budget is None else self.steps + step_budget
+        next_sample = None if sample_seconds is None else start + sample_seconds
+        clock = time.perf_counter
+        # The budgets are checked before every step, so a spent budget (0 steps, or
+        # steps already past it) runs no step at all
+        while (last_step is None or self.steps < last_step) and (deadline is None or clock() < deadline):
+            solved = self.step()
+            self.steps += 1
+            if solved or (last_step is not None and self.steps >= last_step) or \
+                    (deadline is not None and clock() >= deadline):
+                break
+            if next_sample is None:
+                if self.steps % sample_every == 0:
+                    yield self.progress(start)
+            elif clock() >= next_sample:
+                next_sample = clock() + sample_seconds
+                yield self.progress(start)
+        yield self.progress(start, finished=True)
+
+
+class GWSATSolver(AnytimeSolver):
+    """
+    GWSATSolver(num_vars, clauses, wp, restart_flips=None, backend="python", seed=None, tenure=0)
+
+    GWSAT with the moves of gwsat.py, restarting from a random configuration
+    every `restart_flips` flips (half the number of clauses by default).
+    `tenure` is the tabu tenure of the greedy move.
+    best_value() is the number of falsified clauses of the best configuration
+    """
+
+    def __init__(self, num_vars, clauses, wp, restart_flips=None, backend="python", seed=None, tenure=0):
+        AnytimeSolver.__init__(self, seed)
+        self.tenure = tenure
+        self.database = clausedb.as_database(num_vars, clauses)
+        self.evaluator = self.new_evaluator(backend)
+        self.wp = wp
+        self.restart_flips = restart_flips or max(1, len(self.database) // 2)
+        self.restart_best = None
+        self.best_configuration = None
+        self.best_cost = None
+        self.restart()
+
+    def new_evaluator(self, backend):
+        return localsearch.IncrementalEvaluator(self.database, vectorized.load_backend(backend, self.database))
+
+    def cost(self):
+        return len(self.database) - self.evaluator.num_sat_clauses
+
+    def restart(self):
+        """
+        Keeps the best configuration of the finished restart and starts a new one
+        """
+        self.keep_restart_best()
+        self.evaluator.reset(localsearch.random_value_assignment(self.evaluator.num_vars, self.rng))
+        self.evaluator.last_flipped = 0
+        # BestSoFar keeps the configuration with the highest score, here -cost
+        self.restart_best = bitassign.BestSoFar(self.evaluator.configuration, -self.cost())
+        self.restart_step = 0
+
+    def keep_restart_best(self):
+        if self.restart_best is not None and (self.best_cost is None or
+                                              -self.restart_best.num_sat_clauses < self.best_cost):
+            self.best_configuration = self.restart_best.best()
+            self.best_cost = -self.restart_best.num_sat_clauses
+
+    def move(self):
+        if self.rng.random() < self.wp:
+            gwsat.random_walk(self.evaluator, self.rng)
+        else:
+            localsearch.choose_and_flip(self.evaluator, self.rng, self.tenure)
+
+    def step(self):
+        if self.restart_step == self.restart_flips:
+            self.restart()
+        self.restart_step += 1
+        self.move()
+        if self.evaluator.last_flipped:
+            self.restart_best.flipped(self.evaluator.last_flipped)
+            self.evaluator.last_flipped = 0
+        cost = self.cost()
+        if -cost > self.restart_best.num_sat_clauses:
+            self.restart_best.improved(self.evaluator.configuration, -cost)
+        return cost == 0
+
+    def best_value(self):
+        restart_cost = -self.restart_best.num_sat_clauses
+        return restart_cost if self.best_cost is None else min(self.best_cost, restart_cost)
+
+    def best(self):
+        """
+        best() -> bitassign.BitAssignment with the best configuration so far
+        """
+        self.keep_restart_best()
+        return self.best_configuration
+
+
+class WeightedWalkSATSolver(GWSATSolver):
+    """
+    WeightedWalkSATSolver(num_vars, clauses, top_weight, wp, restart_flips=None, backend="python", seed=None)
+
+    Weighted WalkSAT with the moves of wwalksat.py. best_value() is the cost
+    (weight of the falsified clauses, see localsearch.WeightedEvaluator) of
+    the best configuration
+    """
+
+    def __init__(self, num_vars, clauses, top_weight, wp, restart_flips=None, backend="python", seed=None):
+        self.top_weight = top_weight
+        GWSATSolver.__init__(self, num_vars, clauses, wp, restart_flips, backend, seed)
+
+    def new_evaluator(self, backend):
+        return localsearch.WeightedEvaluator(self.database, self.top_weight,
+                                             vectorized.load_backend(backend, self.database))
+
+    def cost(self):
+        return self.evaluator.cost
+
+    def move(self):
+        if self.rng.random() < self.wp:
+            wwalksat.random_walk(self.evaluator, self.rng)
+        else:
+            wwalksat.greedy_flip(self.evaluator, self.rng)
+
+
+class GASolver(AnytimeSolver):
+    """
+    GASolver(chromosomes, num_genes, chromosome_fitness, operation, backend="python", seed=None, batch=False)
+
+    The genetic algorithm of ga.py, one generation per step. It never counts
+    as solved, so it runs until the budget is spent. best_value() is the
+    total fitness of the population and best() the fittest individual as
+    (chromosome, fitness)
+    """
+
+    def __init__(self, chromosomes, num_genes, chromosome_fitness, operation, backend="python", seed=None,
+                 batch=False):
+        AnytimeSolver.__init__(self, seed)
+        self.operation = operation
+        self.use_numpy = vectorized.select_backend(backend) == "numpy"
+        self.current_configuration = localsearch.random_value_assignment(num_genes, self.rng)
+        self.mutation_rate = 1 / len(chromosomes)
+        self.population = Population(chromosomes, chromosome_fitness)
+        self.genotypes = None
+        if batch:
+            self.genotypes = [ga.genotype_of(chromosome, self.current_configuration) for chromosome in chromosomes]
+
+    def step(self):
+        if self.genotypes is not None:
+            ga.evolve_generation_batch(self.population, self.genotypes, ga.NUM_OF_PAIRS, self.operation,
+                                       self.mutation_rate, self.rng, self.use_numpy)
+        else:
+            ga.evolve_generation(self.population, self.current_configuration, ga.NUM_OF_PAIRS, self.operation,
+                                 self.mutation_rate, self.rng, self.use_numpy)
+        return False
+
+    def best_value(self):
+        return self.population.total_fitness
+
+    def best(self):
+        fitness = self.population.chromosome_fitness
+        index = max(range(len(fitness)), key=fitness.__getitem__)
+        return list(self.population.chromosomes[index]), fitness[index]
+
+
+def print_progress(events, label="best"):
+    """
+    print_progress(events, label) -> the same events
+
+    Console consumer of a Progress stream: prints every event and passes it on
+    """
+    for event in events:
+        print("c {:.3f}s steps {} {} {} rate {:.0f}/s{}".format(event.elapsed, event.steps, label, event.best,
+                                                             event.rate, " (finished)" if event.finished else ""))
+        yield event
+
+
+def last_event(events):
+    """
+    Consumes a Progress stream and returns its last event
+    """
+    event = None
+    for event in events:
+        pass
+    return event
@@ -0,0 +1,279 @@
+import csv
+import json
+import os
+import statistics
+import time
+import dimacs
+import formulacache
+import ga
+import gwsat
+import wwalksat
+import paws
+
+
+# Extensions recognised when a directory is benchmarked
+CNF_EXTENSIONS = (".cnf", ".cnf.gz", ".cnf.bz2", ".cnf.xz")
+WCNF_EXTENSIONS = (".wcnf", ".wcnf.gz", ".wcnf.bz2", ".wcnf.xz")
+
+# Algorithms that stop when they succeed, their runs have flips and a success flag
+LOCAL_SEARCH = ("gwsat", "gwsat-adaptive", "paws", "wwalksat")
+
+CSV_FIELDS = ["algorithm", "instance", "seed", "success", "flips", "generations", "time_ns",
+              "flips_per_second", "generations_per_second", "best", "num_clauses"]
+
+
+def find_instances(paths):
+    """
+    find_instances(paths) -> sorted list of .cnf/.wcnf files
+
+    Every path may be a file or a directory, directories are not searched
+    recursively
+    """
+    instances = list()
+    for path in paths:
+        if os.path.isdir(path):
+            for name in os.listdir(path):
+                if name.endswith(CNF_EXTENSIONS + WCNF_EXTENSIONS):
+                    instances.append(os.path.join(path, name))
+        else:
+            instances.append(path)
+    return sorted(instances)
+
+
+def load_instance(filename, file_type, use_cache=True, cache_dir=None):
+    """
+    load_instance(filename, file_type, use_cache, cache_dir) -> database, top_fitness, parse time in ns
+    """
+    start = time.perf_counter_ns()
+    if use_cache:
+        database, top_fitness = formulacache.load_formula(filename, file_type, cache_dir)
+    else:
+        database, top_fitness = dimacs.parse(filename, file_type)
+    return database, top_fitness, time.perf_counter_ns() - start
+
+
+def bench_gwsat(filename, database, seed, num_flips, wp, steps, backend, adaptive=False):
+    """
+    Runs gwsat.solve once, with adaptive noise if `adaptive` is set, and
+    returns its row of the runs table
+    """
+    noise = gwsat.AdaptiveNoise(len(database)) if adaptive else None
+    start = time.perf_counter_ns()
+    clauses_sat, *_ = gwsat.solve(database.num_vars, database, num_flips, wp, steps, backend=backend, seed=seed,
+                                  noise=noise)
+    elapsed = time.perf_counter_ns() - start
+
+    best = clauses_sat.maximum or 0
+    return {
+        "algorithm": "gwsat-adaptive" if adaptive else "gwsat",
+        "instance": filename,
+        "seed": seed,
+        "success": best == len(database),
+        "flips": len(clauses_sat),
+        "generations": "",
+        "time_ns": elapsed,
+        "flips_per_second": len(clauses_sat) / (elapsed / 1e9) if elapsed else 0.0,
+        "generations_per_second": "",
+        "best": best,
+        "num_clauses": len(database),
+    }
+
+
+def bench_paws(filename, database, seed, max_flips, backend):
+    """
+    Runs paws.solve once and returns its row of the runs table
+    """
+    start = time.perf_counter_ns()
+    clauses_sat = paws.solve(database.num_vars, database, max_flips, backend=backend, seed=seed)
+    elapsed = time.perf_counter_ns() - start
+
+    best = clauses_sat.maximum or 0
+    return {
+        "algorithm": "paws",
+        "instance": filename,
+        "seed": seed,
+        "success": best == len(database),
+        "flips": len(clauses_sat),
+        "generations": "",
+        "time_ns": elapsed,
+        "flips_per_second": len(clauses_sat) / (elapsed / 1e9) if elapsed else 0.0,
+        "generations_per_second": "",
+        "best": best,
+        "num_clauses": len(database),
+    }
+
+
+def bench_wwalksat(filename, database, top_fitness, seed, num_flips, wp, steps, backend):
+    """
+    Runs wwalksat.solve once and returns its row of the runs table. A run
+    succeeds when it satisfies every hard clause, `best` is the lowest cost
+    """
+    start = time.perf_counter_ns()
+    cost_values, best_configuration, best_cost = wwalksat.solve(database.num_vars, database, top_fitness,
+                                                                num_flips, wp, steps, backend=backend, seed=seed)
+    elapsed = time.perf_counter_ns() - start
+
+    hard_weight = 1 + sum(weight for weight in database.weights if not top_fitness or weight < top_fitness)
+    return {
+        "algorithm": "wwalksat",
+        "instance": filename,
+        "seed": seed,
+        "success": best_cost < hard_weight,
+        "flips": len(cost_values),
+        "generations": "",
+        "time_ns": elapsed,
+        "flips_per_second": len(cost_values) / (elapsed / 1e9) if elapsed else 0.0,
+        "generations_per_second": "",
+        "best": best_cost,
+        "num_clauses": len(database),
+    }
+
+
+def bench_ga(filename, database, seed, operation, generations, backend):
+    """
+    Runs ga.solve once and returns its row of the runs table. The GA always
+    runs every generation, so its runs have no success flag
+    """
+    chromosomes = [list(chromosome) for chromosome in database]
+    chromosome_fitness = list(database.weights)
+
+    start = time.perf_counter_ns()
+    fitness_values, time_values = ga.solve(chromosomes, database.num_vars, chromosome_fitness, operation,
+                                           generations, backend=backend, seed=seed, verbose=False)
+    elapsed = time.perf_counter_ns() - start
+
+    return {
+        "algorithm": "ga-" + operation,
+        "instance": filename,
+        "seed": seed,
+        "success": "",
+        "flips": "",
+        "generations": generations,
+        "time_ns": elapsed,
+        "flips_per_second": "",
+        "generations_per_second": generations / (elapsed / 1e9) if elapsed else 0.0,
+        "best": max(fitness_values, default=0),
+        "num_clauses": len(database),
+    }
+
+
+def summarize(rows, parse_times):
+    """
+    summarize(rows, parse_times) -> list of one summary per (instance, algorithm)
+
+    The run-length distribution holds the sorted flips of the successful runs
+    and the run-time distribution the sorted seconds of the successful runs
+    (of every run for the GA)
+    """
+    groups = dict()
+    for row in rows:
+        groups.setdefault((row["instance"], row["algorithm"]), list()).append(row)
+
+    summaries = list()
+    for (instance, algorithm), runs in sorted(groups.items()):
+        local_search = algorithm in LOCAL_SEARCH
+        solved = [run for run in runs if run["success"] is True]
+        rate = "flips_per_second" if local_search else "generations_per_second"
+        summaries.append({
+            "instance": instance,
+            "algorithm": algorithm,
+            "runs": len(runs),
+            "success_rate": len(solved) / len(runs) if local_search else None,
+            "parse_seconds": parse_times[instance] / 1e9,
+            "run_length_distribution": sorted(run["flips"] for run in solved),
+            "median_flips_to_solution": statistics.median(run["flips"] for run in solved) if solved else None,
+            "run_time_distribution": sorted(run["time_ns"] / 1e9 for run in (solved if local_search else runs)),
+            "median_time_seconds": statistics.median(run["time_ns"] / 1e9 for run in runs),
+            "mean_" + rate: statistics.mean(run[rate] for run in runs),
+        })
+    return summaries
+
+
+def print_comparison(summaries):
+    """
+    Prints the success rate and median flips to solution of GWSAT (fixed
+    and adaptive noise) and PAWS side by side for every .cnf instance
+    """
+    by_instance = dict()
+    for summary in summaries:
+        if summary["algorithm"] in ("gwsat", "gwsat-adaptive", "paws"):
+            by_instance.setdefault(summary["instance"], dict())[summary["algorithm"]] = summary
+    for instance, algorithms in sorted(by_instance.items()):
+        print("c Flips to solution on ", instance, ": ", ", ".join(
+            "{} median {} (solved {:.0%})".format(algorithm, summary["median_flips_to_solution"],
+                                                  summary["success_rate"])
+            for algorithm, summary in sorted(algorithms.items())))
+
+
+def write_results(out_dir, rows, summaries):
+    os.makedirs(out_dir, exist_ok=True)
+    with open(os.path.join(out_dir, "runs.csv"), "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+    with open(os.path.join(out_dir, "summary.json"), "w") as f:
+        json.dump(summaries, f, indent=2)
+    print("c Benchmark results written to ", out_dir)
+
+
+def write_plots(out_dir, summaries):
+    """
+    Renders the empirical run-time distribution of every instance to a PNG
+    file. matplotlib is only imported here, with a non interactive backend
+    """
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    for summary in summaries:
+        distribution = summary["run_time_distribution"]
+        if not distribution:
+            continue
+        fraction = [(index + 1) / summary["runs"] for index in range(len(distribution))]
+        plt.figure()
+        plt.title("RTD " + summary["algorithm"] + " " + os.path.basename(summary["instance"]))
+        plt.step(distribution, fraction, where="post")
+        plt.xlabel("Time (s)")
+        plt.ylabel("P(solve)" if summary["algorithm"] in LOCAL_SEARCH else "Fraction of runs")
+        name = "rtd-{}-{}.png".format(summary["algorithm"], os.path.basename(summary["instance"]))
+        plt.savefig(os.path.join(out_dir, name))
+        plt.close()
+
+
+def run(paths, runs=10, out_dir="bench_results", plots=False, seed=0, num_flips=None, wp=0.4, steps=50,
+        generations=50, backend="python", use_cache=True, cache_dir=None):
+    """
+    run(paths, runs, out_dir, plots, seed, ...) -> summaries
+
+    Benchmarks GWSAT and PAWS on every .cnf instance and GA (single and two point
+    crossover) and weighted WalkSAT on every .wcnf instance found in `paths`, `runs` times each
+    with the seeds seed, seed+1, ... Writes runs.csv and summary.json to
+    `out_dir`, and RTD plots if `plots` is set. The number of flips defaults
+    to half the number of clauses, as in main.py
+    """
+    rows = list()
+    parse_times = dict()
+    for filename in find_instances(paths):
+        weighted = filename.endswith(WCNF_EXTENSIONS)
+        database, top_fitness, parse_times[filename] = load_instance(filename, "wcnf" if weighted else "cnf",
+                                                                     use_cache, cache_dir)
+        print("c Benchmarking ", filename)
+        for run_seed in range(seed, seed + runs):
+            if weighted:
+                for operation in ("single", "two"):
+                    rows.append(bench_ga(filename, database, run_seed, operation, generations, backend))
+                rows.append(bench_wwalksat(filename, database, top_fitness, run_seed, num_flips or len(database) // 2,
+                                           wp, steps, backend))
+            else:
+                flips = num_flips or len(database) // 2
+                rows.append(bench_gwsat(filename, database, run_seed, flips, wp, steps, backend))
+                rows.append(bench_gwsat(filename, database, run_seed, flips, wp, steps, backend, adaptive=True))
+                # PAWS gets the flips of every GWSAT restart in a single run
+                rows.append(bench_paws(filename, database, run_seed, flips * steps, backend))
+
+    summaries = summarize(rows, parse_times)
+    print_comparison(summaries)
+    write_results(out_dir, rows, summaries)
+    if plots:
+        write_plots(out_dir, summaries)
+    return summaries
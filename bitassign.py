@@ -0,0 +1,153 @@
+# bytes.translate tables between one byte per value (0/1) and ASCII digits
+TO_DIGITS = bytes.maketrans(b"\x00\x01", b"01")
+FROM_DIGITS = bytes.maketrans(b"01", b"\x00\x01")
+
+
+def pack(values):
+    """
+    pack(values) -> int with bit i set if values[i] is true
+    """
+    digits = bytes(bytearray(map(bool, values))).translate(TO_DIGITS)
+    return int(digits[::-1], 2) if digits else 0
+
+
+def unpack(number, num_vars):
+    """
+    unpack(number, num_vars) -> bytearray with one 0/1 byte per variable
+    """
+    digits = format(number, "0{}b".format(num_vars)).encode()[::-1] if num_vars else b""
+    return bytearray(digits[:num_vars].translate(FROM_DIGITS))
+
+
+class BitAssignment:
+    """
+    BitAssignment(num_vars)
+
+    Interpretation stored one bit per variable in a bytearray, 64 times
+    smaller than a list of booleans. It can be used wherever a list from
+    localsearch.random_value_assignment is expected (indexing, assignment,
+    len, iteration) and flips in place in O(1) with flip(index)
+    """
+
+    __slots__ = ("num_vars", "bits")
+
+    def __init__(self, num_vars, bits=None):
+        self.num_vars = num_vars
+        self.bits = bytearray((num_vars + 7) // 8) if bits is None else bits
+
+    @classmethod
+    def from_values(cls, values):
+        """
+        from_values(values) -> BitAssignment with the truth values of a sequence of booleans
+        """
+        values = list(values)
+        return cls.from_int(pack(values), len(values))
+
+    @classmethod
+    def from_int(cls, number, num_vars):
+        return cls(num_vars, bytearray(number.to_bytes((num_vars + 7) // 8, "little")))
+
+    def to_int(self):
+        return int.from_bytes(self.bits, "little")
+
+    def to_bytearray(self):
+        """
+        Returns the values unpacked to one 0/1 byte per variable
+        """
+        return unpack(self.to_int(), self.num_vars)
+
+    def to_list(self):
+        return [bool(value) for value in self.to_bytearray()]
+
+    def __len__(self):
+        return self.num_vars
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self.num_vars
+        return bool(self.bits[index >> 3] >> (index & 7) & 1)
+
+    def __setitem__(self, index, value):
+        if index < 0:
+            index += self.num_vars
+        if value:
+            self.bits[index >> 3] |= 1 << (index & 7)
+        else:
+            self.bits[index >> 3] &= ~(1 << (index & 7)) & 0xFF
+
+    def __iter__(self):
+        return iter(self.to_list())
+
+    def __eq__(self, other):
+        if isinstance(other, BitAssignment):
+            return self.num_vars == other.num_vars and self.bits == other.bits
+        return self.to_list() == list(other)
+
+    def __repr__(self):
+        return "BitAssignment({})".format(self.to_list())
+
+    def flip(self, index):
+        self.bits[index >> 3] ^= 1 << (index & 7)
+
+    def copy(self):
+        """
+        Snapshot of the assignment, copies num_vars / 8 bytes
+        """
+        return BitAssignment(self.num_vars, bytearray(self.bits))
+
+
+class BestSoFar:
+    """
+    BestSoFar(configuration, num_sat_clauses)
+
+    Keeps the best configuration seen by a local search without copying the
+    configuration on every improvement. It holds a packed snapshot (anchor)
+    and the variables flipped since then; the best configuration is the
+    anchor plus the first `best_length` flips of the log. The log is folded
+    into the anchor every `threshold` flips, so memory stays bounded and a
+    full snapshot is taken at most once every `threshold` flips
+    """
+
+    def __init__(self, configuration, num_sat_clauses):
+        self.threshold = max(64, len(configuration) // 8)
+        self.reset(configuration, num_sat_clauses)
+
+    def reset(self, configuration, num_sat_clauses):
+        self.anchor = BitAssignment.from_values(configuration)
+        self.log = list()
+        self.best_length = 0
+        self.log_valid = True
+        self.num_sat_clauses = num_sat_clauses
+
+    def flipped(self, var):
+        """
+        Records that `var` (1 based) was flipped
+        """
+        self.log.append(var)
+        if len(self.log) > self.threshold:
+            for flipped_var in self.log[:self.best_length]:
+                self.anchor.flip(flipped_var - 1)
+            # The anchor is now the best configuration, but the current one
+            # can no longer be rebuilt from it
+            self.log = list()
+            self.best_length = 0
+            self.log_valid = False
+
+    def improved(self, configuration, num_sat_clauses):
+        """
+        Records that `configuration` is the new best one
+        """
+        if not self.log_valid:
+            self.reset(configuration, num_sat_clauses)
+        else:
+            self.best_length = len(self.log)
+            self.num_sat_clauses = num_sat_clauses
+
+    def best(self):
+        """
+        best() -> BitAssignment with the best configuration
+        """
+        snapshot = self.anchor.copy()
+        for var in self.log[:self.best_length]:
+            snapshot.flip(var - 1)
+        return snapshot
@@ -0,0 +1,134 @@
+import array
+import json
+import os
+import struct
+import sys
+import time
+from formulacache import aligned
+
+
+# Bump FORMAT_VERSION whenever the layout below changes
+MAGIC = b"SATCKPT\0"
+FORMAT_VERSION = 1
+
+# magic, version, byte order, length of the JSON description
+HEADER = struct.Struct("<8sIcxxxq")
+
+
+def write_checkpoint(path, run, states):
+    """
+    Writes a checkpoint: header, a JSON description of the run and of every
+    solver state (its small values and the type and length of its arrays),
+    then the raw bytes of the arrays, each starting on an 8 byte boundary.
+
+    `states` maps a name to (metadata, arrays) where arrays maps a name to an
+    array.array. The file is written to a temporary name, synced and renamed
+    so a crash never leaves a partial checkpoint behind
+    """
+    description = {"run": run, "states": {
+        name: {"metadata": metadata,
+               "arrays": [[key, values.typecode, len(values)] for key, values in arrays.items()]}
+        for name, (metadata, arrays) in states.items()}}
+    body = json.dumps(description).encode()
+    temp_path = "{}.{}.tmp".format(path, os.getpid())
+    with open(temp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, sys.byteorder[0].encode(), len(body)))
+        f.write(body)
+        f.write(b"\0" * (aligned(f.tell()) - f.tell()))
+        for _, arrays in states.values():
+            for values in arrays.values():
+                values.tofile(f)
+                f.write(b"\0" * (aligned(f.tell()) - f.tell()))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+
+def read_checkpoint(path):
+    """
+    read_checkpoint(path) -> run, states as given to write_checkpoint
+
+    Raises ValueError if the file is not a checkpoint of this version
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    if len(data) < HEADER.size:
+        raise ValueError("{} is not a checkpoint".format(path))
+    magic, version, byte_order, length = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("{} is not a checkpoint".format(path))
+    if version != FORMAT_VERSION or byte_order != sys.byteorder[0].encode():
+        raise ValueError("{} was written by another version or on another platform".format(path))
+
+    description = json.loads(data[HEADER.size:HEADER.size + length])
+    position = aligned(HEADER.size + length)
+    states = dict()
+    for name, state in description["states"].items():
+        arrays = dict()
+        for key, typecode, count in state["arrays"]:
+            values = array.array(typecode)
+            values.frombytes(data[position:position + count * values.itemsize])
+            arrays[key] = values
+            position = aligned(position + count * values.itemsize)
+        states[name] = (state["metadata"], arrays)
+    return description["run"], states
+
+
+def rng_state(rng):
+    """
+    rng_state(rng) -> metadata, array with the state of a random.Random
+    """
+    version, internal, gauss_next = rng.getstate()
+    return {"rng_version": version, "gauss_next": gauss_next}, array.array("I", internal)
+
+
+def set_rng_state(rng, metadata, internal):
+    rng.setstate((metadata["rng_version"], tuple(internal), metadata["gauss_next"]))
+
+
+class Checkpointer:
+    """
+    Checkpointer(path, interval=60.0, run=None, states=None)
+
+    Saves the state of the solvers of a run to `path`. A solver asks due()
+    at its own safe points (between two restarts of GWSAT, between two
+    generations of the GA) and, when `interval` seconds have passed since
+    the last write, calls save() with its state under its name. The states
+    of every solver of the run are kept, so the GA runs of main.py share one
+    file. `run` describes the run (see manifest.new_manifest) and `states`
+    are the states read from a checkpoint to resume from, see state()
+    """
+
+    def __init__(self, path, interval=60.0, run=None, states=None):
+        self.path = path
+        self.interval = interval
+        self.run = run
+        self.states = dict(states or {})
+        self.last_write = time.monotonic()
+        self.writes = 0
+        self.write_time = 0.0
+
+    def due(self):
+        return time.monotonic() - self.last_write >= self.interval
+
+    def state(self, name):
+        """
+        state(name) -> (metadata, arrays) saved by solver `name`, None if there is none
+        """
+        return self.states.get(name)
+
+    def save(self, name, metadata, arrays):
+        start = time.perf_counter()
+        self.states[name] = (metadata, arrays)
+        write_checkpoint(self.path, self.run, self.states)
+        self.write_time += time.perf_counter() - start
+        self.writes += 1
+        self.last_write = time.monotonic()
+
+    def report(self, elapsed):
+        """
+        Prints the number of checkpoints written and the share of `elapsed`
+        seconds they took
+        """
+        print("c Checkpoints: ", self.writes, " written to ", self.path, " in ", round(self.write_time, 3), " s (",
+              round(100 * self.write_time / elapsed, 2) if elapsed > 0 else 0, "% of the run)")
@@ -0,0 +1,134 @@
+from array import array
+
+
+class ClauseDatabase:
+    """
+    ClauseDatabase(num_vars, weighted=False)
+
+    Compact storage for a formula. The literals of every clause are stored one
+    after the other in a flat array('i') and offsets[index] points to the first
+    literal of clause `index`, so clause ids are plain integers:
+
+        literals[offsets[index]:offsets[index+1]] -> literals of clause index
+
+    Satisfaction counts and occurrence lists are kept in integer arrays indexed
+    by the same clause ids, see new_counts() and build_occurrences(). Weighted
+    formulas (.wcnf) also keep the weight of every clause in `weights`.
+    """
+
+    def __init__(self, num_vars, weighted=False):
+        self.num_vars = num_vars
+        self.literals = array('i')
+        self.offsets = array('q', [0])
+        self.weights = array('q') if weighted else None
+
+    @classmethod
+    def from_clauses(cls, num_vars, clauses, weights=None):
+        """
+        from_clauses(num_vars, clauses, weights) -> ClauseDatabase
+
+        Builds the database from a list of clauses such as [[1, -3, 4], [4], [2, -3]]
+        and optionally the list of their weights, see add_clause
+        """
+        database = cls(num_vars, weighted=weights is not None)
+        if weights is None:
+            for clause in clauses:
+                database.add_clause(clause)
+        else:
+            for clause, weight in zip(clauses, weights):
+                database.add_clause(clause, weight)
+        return database
+
+    @classmethod
+    def from_buffers(cls, num_vars, literals, offsets, weights=None):
+        """
+        from_buffers(num_vars, literals, offsets, weights) -> ClauseDatabase
+
+        Wraps existing integer buffers (arrays or memoryviews, e.g. over a
+        memory-mapped file) without copying them. Such databases are read only
+        """
+        database = cls(num_vars)
+        database.literals = literals
+        database.offsets = offsets
+        database.weights = weights
+        return database
+
+    def add_clause(self, clause, weight=1):
+        """
+        add_clause(clause, weight) -> clause id, -1 if the clause is dropped
+
+        A literal repeated in the clause is stored once and a tautology (a
+        clause with both x and -x, always satisfied) is dropped, so a variable
+        occurs at most once per clause, as the evaluators of localsearch.py
+        count it. `weight` is only stored by weighted databases
+        """
+        literals = dict.fromkeys(clause)
+        if any(-literal in literals for literal in literals):
+            return -1
+        self.literals.extend(literals)
+        self.offsets.append(len(self.literals))
+        if self.weights is not None:
+            self.weights.append(weight)
+        return len(self.offsets) - 2
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self.clause(index)
+
+    def clause(self, index):
+        """
+        clause(index) -> array('i') with the literals of the clause
+        """
+        return self.literals[self.offsets[index]:self.offsets[index+1]]
+
+    def new_counts(self):
+        """
+        Returns an integer array with one zero counter per clause
+        """
+        return array('i', bytes(array('i').itemsize * len(self)))
+
+    def build_occurrences(self):
+        """
+        build_occurrences() -> occ_offsets, occ_clauses, occ_literals
+
+        Builds the variable -> occurrence index in CSR form. The clauses where
+        variable `var` appears, together with the literal it appears as, are:
+
+            occ_clauses[occ_offsets[var]:occ_offsets[var+1]]
+            occ_literals[occ_offsets[var]:occ_offsets[var+1]]
+        """
+        sizes = [0] * (self.num_vars + 2)
+        for literal in self.literals:
+            sizes[abs(literal)+1] += 1
+
+        occ_offsets = array('q', [0]) * (self.num_vars + 2)
+        for var in range(1, self.num_vars + 2):
+            occ_offsets[var] = occ_offsets[var-1] + sizes[var]
+
+        occ_clauses = array('i', bytes(array('i').itemsize * len(self.literals)))
+        occ_literals = array('i', bytes(array('i').itemsize * len(self.literals)))
+        position = list(occ_offsets)
+        offsets = self.offsets
+        for index in range(len(self)):
+            for literal in self.literals[offsets[index]:offsets[index+1]]:
+                var = abs(literal)
+                occ_clauses[position[var]] = index
+                occ_literals[position[var]] = literal
+                position[var] += 1
+
+        return occ_offsets, occ_clauses, occ_literals
+
+
+def as_database(num_vars, clauses):
+    """
+    as_database(num_vars, clauses) -> ClauseDatabase
+
+    Returns `clauses` unchanged if it already is a ClauseDatabase, otherwise
+    builds one from the list of clauses
+    """
+    if isinstance(clauses, ClauseDatabase):
+        return clauses
+    return ClauseDatabase.from_clauses(num_vars, clauses)
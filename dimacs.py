@@ -0,0 +1,148 @@
+import bz2
+import gzip
+import lzma
+from clausedb import ClauseDatabase
+
+
+# Size of the blocks read from the input file
+CHUNK_SIZE = 1 << 20
+
+# Magic numbers of the supported compressed formats
+COMPRESSED_FORMATS = [
+    (b"\x1f\x8b", gzip.open),
+    (b"BZh", bz2.open),
+    (b"\xfd7zXZ\x00", lzma.open),
+]
+
+
+def open_formula(filename):
+    """
+    open_formula(filename) -> binary file object
+
+    Opens a .cnf/.wcnf file for reading. gzip, bz2 and xz compressed files
+    are recognised by their first bytes and decompressed on the fly
+    """
+    with open(filename, "rb") as f:
+        magic = f.read(6)
+    for prefix, opener in COMPRESSED_FORMATS:
+        if magic.startswith(prefix):
+            return opener(filename, "rb")
+    return open(filename, "rb")
+
+
+def read_lines(f):
+    """
+    Yields the lines of the file reading it in blocks of CHUNK_SIZE bytes
+    """
+    remainder = b""
+    while True:
+        chunk = f.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        lines = (remainder + chunk).split(b"\n")
+        remainder = lines.pop()
+        yield from lines
+    if remainder:
+        yield remainder
+
+
+def parse(filename, file_type):
+    """
+    parse(filename, file_type) -> database, top_fitness
+
+    Single pass parser for DIMACS cnf and wcnf files. The body is tokenized
+    block by block, so clauses may span several lines, and every clause is
+    appended straight to a clausedb.ClauseDatabase. Repeated literals are
+    kept once and tautologies (clauses with x and -x) are dropped, then
+    repeated clauses are dropped by hashing the sorted tuple of their
+    literals (and their weight for wcnf files).
+
+    Raises ValueError with the line number if the p line is not of
+    `file_type`, a token is not an integer, a literal is out of range or a
+    clause of a wcnf file has no weight
+    """
+    weighted = file_type == "wcnf"
+    database = None
+    num_vars = 0
+    top_fitness = 0
+    seen = set()
+    clause = []
+
+    with open_formula(filename) as f:
+        ok_to_read = False
+        for line_number, line in enumerate(read_lines(f), 1):
+            line = line.strip()
+            if not line or line[:1] == b"c":
+                continue
+            if line[:1] == b"%":
+                break
+            if line[:1] == b"p":
+                first_line = line.decode().split()
+                if len(first_line) < 3 or first_line[1] != file_type:
+                    raise ValueError("Invalid File Type at line {}. File type has to be {}".format(
+                        line_number, file_type.upper()))
+                try:
+                    num_vars = int(first_line[2])
+                    if weighted and len(first_line) > 4:
+                        top_fitness = int(first_line[4])
+                except ValueError:
+                    raise ValueError("Invalid p line at line {}".format(line_number)) from None
+                database = ClauseDatabase(num_vars, weighted=weighted)
+                ok_to_read = True
+                continue
+            if not ok_to_read:
+                continue
+
+            try:
+                values = [int(value) for value in line.split()]
+            except ValueError:
+                raise ValueError("Invalid literal at line {}".format(line_number)) from None
+            for value in values:
+                if value != 0:
+                    clause.append(value)
+                    continue
+
+                if weighted:
+                    if not clause:
+                        raise ValueError("Clause without a weight at line {}".format(line_number))
+                    weight = clause[0]
+                    literals = dict.fromkeys(clause[1:])
+                else:
+                    weight = 1
+                    literals = dict.fromkeys(clause)
+                clause = []
+
+                for literal in literals:
+                    if literal < -num_vars or literal > num_vars:
+                        raise ValueError("Error in variable value {} at line {}. It must be in range [1, {}]".format(
+                            literal, line_number, num_vars))
+                if any(-literal in literals for literal in literals):
+                    continue
+                key = tuple(sorted(literals))
+                if weighted:
+                    key = (weight,) + key
+                if key in seen:
+                    continue
+                seen.add(key)
+                database.add_clause(literals, weight)
+
+    if database is None:
+        database = ClauseDatabase(num_vars, weighted=weighted)
+    return database, top_fitness
+
+
+def read_cnf(filename):
+    """
+    read_cnf(filename) -> database
+    """
+    database, _ = parse(filename, "cnf")
+    return database
+
+
+def read_wcnf(filename):
+    """
+    read_wcnf(filename) -> database, top_fitness
+
+    The weight of every clause is in database.weights
+    """
+    return parse(filename, "wcnf")
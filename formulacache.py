@@ -0,0 +1,138 @@
+import hashlib
+import mmap
+import os
+import struct
+import sys
+import dimacs
+from clausedb import ClauseDatabase
+
+
+# Bump FORMAT_VERSION whenever the layout below or the clauses stored change
+MAGIC = b"SATFCACH"
+FORMAT_VERSION = 2
+EXTENSION = ".fcache"
+# Directory under the user cache directory holding the compiled files, see default_cache_dir
+CACHE_NAME = "gwsat-ga"
+
+# magic, version, byte order, weighted, num_vars, num_clauses, num_literals,
+# top_fitness, source size, source mtime
+HEADER = struct.Struct("<8sIcBxxqqqqqq")
+
+
+def default_cache_dir():
+    """
+    default_cache_dir() -> directory of the compiled files when no cache_dir is given
+
+    CACHE_NAME in the user cache directory: $XDG_CACHE_HOME (~/.cache by
+    default), %LOCALAPPDATA% on Windows. The directories of the input files
+    are never written, they may be read only or shared
+    """
+    base = os.environ.get("LOCALAPPDATA") if os.name == "nt" else os.environ.get("XDG_CACHE_HOME")
+    return os.path.join(base or os.path.join(os.path.expanduser("~"), ".cache"), CACHE_NAME)
+
+
+def cache_path(filename, cache_dir=None):
+    """
+    cache_path(filename, cache_dir) -> path of the compiled file
+
+    The compiled file is stored in `cache_dir` (default_cache_dir() by
+    default) under a name derived from the absolute path of the source
+    """
+    if cache_dir is None:
+        cache_dir = default_cache_dir()
+    digest = hashlib.sha1(os.path.abspath(filename).encode()).hexdigest()[:16]
+    return os.path.join(cache_dir, os.path.basename(filename) + "." + digest + EXTENSION)
+
+
+def source_key(filename):
+    """
+    source_key(filename) -> (size, mtime in ns) used to invalidate the cache
+    """
+    stat = os.stat(filename)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def aligned(position):
+    return (position + 7) & ~7
+
+
+def write_cache(path, database, top_fitness, key):
+    """
+    Writes the database to `path`: header, literals (int32), clause offsets
+    (int64) and, for wcnf files, clause weights (int64). Every section starts
+    on an 8 byte boundary. The file is written to a temporary name and renamed
+    so readers never see a partial file
+    """
+    weighted = database.weights is not None
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, sys.byteorder[0].encode(), weighted,
+                         database.num_vars, len(database), len(database.literals),
+                         top_fitness, key[0], key[1])
+    temp_path = "{}.{}.tmp".format(path, os.getpid())
+    with open(temp_path, "wb") as f:
+        for section in (header, bytes(database.literals), bytes(database.offsets),
+                        bytes(database.weights) if weighted else b""):
+            f.write(section)
+            f.write(b"\0" * (aligned(f.tell()) - f.tell()))
+    os.replace(temp_path, path)
+
+
+def read_cache(path, key):
+    """
+    read_cache(path, key) -> database, top_fitness or None if the cache is
+    missing, stale or shorter than its header says
+
+    The sections of the file are memory-mapped and wrapped in memoryviews, so
+    nothing is copied or parsed
+    """
+    try:
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    if len(mapped) < HEADER.size:
+        return None
+    magic, version, byte_order, weighted, num_vars, num_clauses, num_literals, top_fitness, size, mtime = \
+        HEADER.unpack_from(mapped)
+    if magic != MAGIC or version != FORMAT_VERSION or byte_order != sys.byteorder[0].encode() \
+            or (size, mtime) != key:
+        return None
+
+    literals_start = aligned(HEADER.size)
+    offsets_start = aligned(literals_start + 4 * num_literals)
+    weights_start = aligned(offsets_start + 8 * (num_clauses + 1))
+    # A truncated file with a valid header is stale as well
+    end = weights_start + 8 * num_clauses if weighted else offsets_start + 8 * (num_clauses + 1)
+    if len(mapped) < end:
+        return None
+
+    view = memoryview(mapped)
+    literals = view[literals_start:literals_start + 4 * num_literals].cast("i")
+    offsets = view[offsets_start:offsets_start + 8 * (num_clauses + 1)].cast("q")
+    weights = view[weights_start:weights_start + 8 * num_clauses].cast("q") if weighted else None
+
+    return ClauseDatabase.from_buffers(num_vars, literals, offsets, weights), top_fitness
+
+
+def load_formula(filename, file_type, cache_dir=None):
+    """
+    load_formula(filename, file_type, cache_dir) -> database, top_fitness
+
+    Loads the compiled version of `filename` if it is up to date, otherwise
+    parses the source with dimacs.parse and compiles it for the next run.
+    The cache is keyed by the size and modification time of the source, so
+    editing the source invalidates it automatically
+    """
+    key = source_key(filename)
+    path = cache_path(filename, cache_dir)
+    cached = read_cache(path, key)
+    if cached is not None and (cached[0].weights is not None) == (file_type == "wcnf"):
+        return cached
+
+    database, top_fitness = dimacs.parse(filename, file_type)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        write_cache(path, database, top_fitness, key)
+    except OSError as error:
+        print("c Could not write formula cache ", path, ": ", error)
+    return database, top_fitness
@@ -1,16 +1,37 @@
 import localsearch
-import functools
+import vectorized
+import checkpoint
+from population import Population, ScoreIndex, raw_score
+from array import array
 import random
 import math
 import time
 
 
-def solve(chromosomes, num_genes, chromosome_fitness, operation, generations=50):
+# Number of pairs that should be picked to mate in every generation
+NUM_OF_PAIRS = 50
+
+
+def solve(chromosomes, num_genes, chromosome_fitness, operation, generations=50, backend="python", seed=None,
+          batch=False, verbose=False, checkpointer=None, incremental=False):
     """
     :param chromosomes: Number of Clauses
     :param num_genes: Number of variables
     :param chromosome_fitness:  Weight of each clause
     :param generations: Number of steps
+    :param backend: "python" or "numpy", how the fitness of the children is calculated
+    :param seed: seed of the random.Random instance every random decision is drawn from
+    :param batch: give every individual its own genotype and score the children of a whole generation
+                  in one call, see evolve_generation_batch
+    :param verbose: print the total fitness of every generation, off by default: the anytime.GASolver
+                    progress events (see anytime.print_progress) are the console stream of a running GA
+    :param checkpointer: checkpoint.Checkpointer that saves the state of the run between two generations
+                         every `checkpointer.interval` seconds and at the end, under the name "ga-<operation>";
+                         if it already holds that state the run continues from it
+    :param incremental: keep the score of every individual up to date and derive the fitness of the children
+                        from those of their parents, see evolve_generation_incremental. Same results; it
+                        pays off on long chromosomes, when there are many more variables than chromosomes.
+                        Ignored with batch
     :return: evolved weight values and time of execution
 
     Public method for solving Genetic algorithm  implementing the following
@@ -21,107 +42,330 @@ def solve(chromosomes, num_genes, chromosome_fitness, operation, generations=50)
     5 - Fitness function
     """
     print("c Applying GA using ", operation)
+    use_numpy = vectorized.select_backend(backend) == "numpy"
+    rng = random.Random(seed)
+
     # 1 - Initial Population
-    current_configuration = localsearch.random_value_assignment(num_genes)
+    current_configuration = localsearch.random_value_assignment(num_genes, rng)
 
     # Number of pairs that should be picked to mate
-    num_of_pairs = 50
+    num_of_pairs = NUM_OF_PAIRS
 
     # Mutation Probability
     mutation_rate = 1 / len(chromosomes)
 
+    genotypes = None
+    if batch:
+        # Every individual carries the values of the variables of its genes
+        genotypes = [genotype_of(chromosome, current_configuration) for chromosome in chromosomes]
+
     fitness_values = list()
     time_values = list()
-    start = time.time()
-    for generation in range(generations):
-        # 2 - Generate a mating pool - Natural Selection
-        parent_pairs, fitness_pair = generate_mating_pool(chromosomes, chromosome_fitness, num_of_pairs)
-        index = 0
-        for parent_pair in parent_pairs:
-
-            # 3 - Generate Children from Parent pairs using either single point crossover or two point crossover
-            children = generate_children(parent_pair, operation)
-
-            # 4 - Mutating the child chromosomes formed from crossover
-            mutated_children = list()
-            for child in children:
-                if child is not None:
-                    mutated_children.append(mutate(child, mutation_rate, current_configuration))
-                else:
-                    break
-
-            # 5 - Calculating the fitness of the child chromosome
-            for child in mutated_children:
-                child_fitness = calculate_fitness(child, fitness_pair[index], current_configuration)
-                worst_genome = chromosome_fitness.index(min(chromosome_fitness))
-                # Create next generation by replacing the chromosome with the worst fitness
-                if child_fitness > min(chromosome_fitness):
-                    chromosomes[worst_genome] = child
-                    chromosome_fitness[worst_genome] = child_fitness
-            index += 1
-        print("Generation: ", generation+1, " of Generation: ", generations)
-        total_fitness = functools.reduce(lambda total, w: total + int(w), chromosome_fitness)
-        print("Total Fitness: ", total_fitness)
+    children_evaluated = 0
+    first_generation = 0
+    elapsed = 0.0
+    name = "ga-" + operation
+    if checkpointer is not None and checkpointer.state(name) is not None:
+        first_generation, elapsed, children_evaluated = resume_state(
+            checkpointer.state(name), rng, current_configuration, chromosomes, chromosome_fitness, genotypes,
+            fitness_values, time_values)
+        if first_generation == generations:
+            print("c The checkpoint holds a finished GA run")
+        else:
+            print("c Resuming GA at generation ", first_generation + 1, " of ", generations)
+
+    # Running total, worst individual and roulette wheel of the population, updated on every replacement
+    population = Population(chromosomes, chromosome_fitness)
+    scores = None
+    if incremental and not batch:
+        scores = ScoreIndex(chromosomes, current_configuration)
+    # Times continue from those of the checkpoint
+    start = time.time() - elapsed
+    for generation in range(first_generation, generations):
+        if checkpointer is not None and checkpointer.due():
+            checkpointer.save(name, *checkpoint_state(generation, time.time() - start, children_evaluated, rng,
+                                                      current_configuration, population, genotypes,
+                                                      fitness_values, time_values))
+        if batch:
+            children_evaluated += evolve_generation_batch(population, genotypes, num_of_pairs, operation,
+                                                          mutation_rate, rng, use_numpy)
+        elif scores is not None:
+            children_evaluated += evolve_generation_incremental(population, scores, num_of_pairs, operation,
+                                                                mutation_rate, rng)
+        else:
+            children_evaluated += evolve_generation(population, current_configuration, num_of_pairs, operation,
+                                                    mutation_rate, rng, use_numpy)
+        total_fitness = population.total_fitness
+        if verbose:
+            print("Generation: ", generation+1, " of Generation: ", generations)
+            print("Total Fitness: ", total_fitness)
         end = time.time()
         fitness_values.append(total_fitness)
         time_values.append(end - start)
+
+    if checkpointer is not None:
+        checkpointer.save(name, *checkpoint_state(generations, time.time() - start, children_evaluated, rng,
+                                                  current_configuration, population, genotypes, fitness_values,
+                                                  time_values))
+        checkpointer.report(time.time() - start)
+    if time_values and time_values[-1] > 0:
+        print("c Children evaluated per second: ", children_evaluated / time_values[-1])
     return fitness_values, time_values
 
 
-def generate_mating_pool(chromosomes, chromosome_fitness, num_of_pairs):
+def checkpoint_state(next_generation, elapsed, children_evaluated, rng, current_configuration, population,
+                     genotypes, fitness_values, time_values):
+    """
+    :return: metadata, arrays for checkpoint.Checkpointer.save
+
+    State of solve() before generation `next_generation`: the random generator, the shared
+    configuration, the chromosomes (concatenated, with their offsets), fitness and genotypes of
+    the population and the recorded series
+    """
+    metadata, internal = checkpoint.rng_state(rng)
+    metadata.update({"next_generation": next_generation, "elapsed": elapsed,
+                     "children_evaluated": children_evaluated})
+    offsets = array("q", [0])
+    genes = array("i")
+    for chromosome in population.chromosomes:
+        genes.extend(chromosome)
+        offsets.append(len(genes))
+    arrays = {"rng": internal, "configuration": array("B", map(bool, current_configuration)),
+              "genes": genes, "offsets": offsets, "fitness": array("q", population.chromosome_fitness),
+              "fitness_values": array("q", fitness_values), "time_values": array("d", time_values)}
+    if genotypes is not None:
+        arrays["genotypes"] = array("B", b"".join(genotypes))
+    return metadata, arrays
+
+
+def resume_state(state, rng, current_configuration, chromosomes, chromosome_fitness, genotypes, fitness_values,
+                 time_values):
+    """
+    :return: next_generation, elapsed, children_evaluated
+
+    Loads a state of checkpoint_state() back into the random generator and, in place, into the
+    lists of solve()
+    """
+    metadata, arrays = state
+    checkpoint.set_rng_state(rng, metadata, arrays["rng"])
+    current_configuration[:] = [bool(value) for value in arrays["configuration"]]
+    offsets = arrays["offsets"]
+    genes = arrays["genes"]
+    chromosomes[:] = [genes[offsets[index]:offsets[index+1]].tolist() for index in range(len(offsets) - 1)]
+    chromosome_fitness[:] = arrays["fitness"].tolist()
+    if genotypes is not None:
+        values = arrays["genotypes"]
+        genotypes[:] = [bytearray(values[offsets[index]:offsets[index+1]]) for index in range(len(offsets) - 1)]
+    fitness_values.extend(arrays["fitness_values"])
+    time_values.extend(arrays["time_values"])
+    return metadata["next_generation"], metadata["elapsed"], metadata["children_evaluated"]
+
+
+def evolve_generation(population, current_configuration, num_of_pairs, operation, mutation_rate, rng,
+                      use_numpy=False):
+    """
+    :return: number of children evaluated
 
+    Runs one generation where mutation flips variables of the shared `current_configuration`
+    and every child is scored against it as soon as it is born
     """
-    :param chromosomes: list of clauses
-    :param chromosome_fitness: list of weights of each clause
+    children_evaluated = 0
+    # 2 - Generate a mating pool - Natural Selection
+    parent_pairs, fitness_pair = generate_mating_pool(population, num_of_pairs, rng)
+    index = 0
+    for parent_pair in parent_pairs:
+
+        # 3 - Generate Children from Parent pairs using either single point crossover or two point crossover
+        children = generate_children(parent_pair, operation, rng)
+
+        # 4 - Mutating the child chromosomes formed from crossover
+        mutated_children = list()
+        for child in children:
+            if child is not None:
+                mutated_children.append(mutate(child, mutation_rate, current_configuration, rng))
+            else:
+                break
+
+        # 5 - Calculating the fitness of the child chromosome
+        if use_numpy and mutated_children:
+            children_fitness = calculate_fitness_batch(mutated_children, fitness_pair[index],
+                                                       current_configuration)
+        else:
+            children_fitness = [calculate_fitness(child, fitness_pair[index], current_configuration)
+                                for child in mutated_children]
+        for child, child_fitness in zip(mutated_children, children_fitness):
+            worst_fitness, worst_genome = population.worst()
+            # Create next generation by replacing the chromosome with the worst fitness
+            if child_fitness > worst_fitness:
+                population.replace(worst_genome, child, child_fitness)
+        index += 1
+        children_evaluated += len(mutated_children)
+    return children_evaluated
+
+
+def evolve_generation_incremental(population, scores, num_of_pairs, operation, mutation_rate, rng):
+    """
+    :param scores: population.ScoreIndex over the population and the shared configuration
+    :return: number of children evaluated
+
+    Same generation as evolve_generation (same random draws, children and fitness) without
+    scoring the children gene by gene. The raw score of every individual under the shared
+    configuration is kept by `scores`: a child takes the score of one parent and swaps the
+    score of the crossed segment for the one of the other parent, and a mutation only
+    updates the individuals and children that contain the flipped variable
+    """
+    children_evaluated = 0
+    # 2 - Generate a mating pool - Natural Selection
+    mating_pool = [([population.chromosomes[index] for index in parent],
+                    [population.chromosome_fitness[index] for index in parent], parent)
+                   for parent in select_parents(population, num_of_pairs, rng)]
+    for parent_pair, fitness_pair, parent in mating_pool:
+        if len(parent_pair) < 2:
+            continue
+        # A parent replaced earlier in this generation has lost its score
+        parent_scores = [scores.scores[index] if population.chromosomes[index] is chromosome
+                         else raw_score(chromosome, scores.configuration)
+                         for index, chromosome in zip(parent, parent_pair)]
+
+        # 3 - Crossover: the children are the parents with the segment between the points swapped
+        first_point, second_point = crossover_points(parent_pair, operation, rng)
+        segments = [scores.segment(chromosome, score, first_point, second_point)
+                    for chromosome, score in zip(parent_pair, parent_scores)]
+        children = [parent_pair[0][:first_point] + parent_pair[1][first_point:second_point] +
+                    parent_pair[0][second_point:],
+                    parent_pair[1][:first_point] + parent_pair[0][first_point:second_point] +
+                    parent_pair[1][second_point:]]
+        children_scores = [parent_scores[0] - segments[0] + segments[1],
+                           parent_scores[1] - segments[1] + segments[0]]
+
+        # 4 - Mutation flips a variable of the shared configuration
+        for child in children:
+            gene_to_mutate = mutation_point(len(child), mutation_rate, rng)
+            if gene_to_mutate is not None:
+                var = abs(child[gene_to_mutate])
+                step = scores.flip(var)
+                children_scores = [score + step * (other.count(var) - other.count(-var))
+                                   for score, other in zip(children_scores, children)]
+
+        # 5 - Fitness of the children, with the bounds of calculate_fitness
+        average_fitness = int((fitness_pair[0] + fitness_pair[1])/2)
+        for child, score in zip(children, children_scores):
+            child_fitness = score if 0 < score < math.pow(2, 63) else average_fitness
+            worst_fitness, worst_genome = population.worst()
+            # Create next generation by replacing the chromosome with the worst fitness
+            if child_fitness > worst_fitness:
+                scores.replace(worst_genome, population.chromosomes[worst_genome], child, score)
+                population.replace(worst_genome, child, child_fitness)
+        children_evaluated += len(children)
+    return children_evaluated
+
+
+def evolve_generation_batch(population, genotypes, num_of_pairs, operation, mutation_rate, rng,
+                            use_numpy=False):
+    """
+    :param genotypes: list with the genotype of every individual of the population
+    :return: number of children evaluated
+
+    Runs one generation where every individual has its own genotype: the values of the
+    variables of its genes. Crossover cuts the genotypes at the same points as the
+    chromosomes and mutation flips a value of the child's own genotype, so the fitness of
+    a child only depends on the child and all the children of the generation are scored
+    in one call to calculate_genotype_fitness_batch
+    """
+    children = list()
+    children_genotypes = list()
+    fitness_pairs = list()
+
+    # 2 - Generate a mating pool - Natural Selection
+    for parent in select_parents(population, num_of_pairs, rng):
+        if len(parent) < 2:
+            continue
+        # 3 - Crossover on (gene, value) pairs so chromosome and genotype are cut together
+        parent_pair = [list(zip(population.chromosomes[index], genotypes[index])) for index in parent]
+        for child in generate_children(parent_pair, operation, rng):
+            genotype = bytearray(value for _, value in child)
+            # 4 - Mutating the genotype of the child
+            mutate_genotype(genotype, mutation_rate, rng)
+            children.append([gene for gene, _ in child])
+            children_genotypes.append(genotype)
+            fitness_pairs.append([population.chromosome_fitness[index] for index in parent])
+
+    # 5 - Calculating the fitness of every child at once
+    children_fitness = calculate_genotype_fitness_batch(children, children_genotypes, fitness_pairs, use_numpy)
+    for child, genotype, child_fitness in zip(children, children_genotypes, children_fitness):
+        worst_fitness, worst_genome = population.worst()
+        # Create next generation by replacing the chromosome with the worst fitness
+        if child_fitness > worst_fitness:
+            population.replace(worst_genome, child, child_fitness)
+            genotypes[worst_genome] = genotype
+    return len(children)
+
+
+def generate_mating_pool(population, num_of_pairs, rng=random):
+
+    """
+    :param population: population.Population over the chromosomes and their fitness
     :param num_of_pairs: Number of parents pairs to be selected for crossover
+    :param rng: random.Random instance to draw from
     :return:
 
-    Selects `num_of_pairs` from the list of chromosomes for crossover.
+    Selects `num_of_pairs` from the list of chromosomes for crossover, see select_parents
+    """
+    parents = []
+    fitness = []
+    for parent in select_parents(population, num_of_pairs, rng):
+        parents.append([population.chromosomes[index] for index in parent])
+        fitness.append([population.chromosome_fitness[index] for index in parent])
+
+    return parents, fitness
+
+
+def select_parents(population, num_of_pairs, rng=random):
+    """
+    :param population: population.Population over the chromosomes and their fitness
+    :param num_of_pairs: Number of parents pairs to be selected for crossover
+    :param rng: random.Random instance to draw from
+    :return: list with the indexes of the parents of every pair (two, one or none of them)
+
     It is defined as follows:
         1) Sum up the fitness values of all chromosomes in the population
         2) Generate a random number between 0 and the sum of the fitness values
         3) Select the first chromosome whose fitness value added to the sum of the fitness
            values of the previous chromosomes is greater than or equal to the random number
+    The second parent is the next chromosome that is different from the first one. The
+    search of step 3 runs on the prefix sums kept by the population in O(log n)
     """
     parents = []
-    fitness = []
+    chromosomes = population.chromosomes
 
     # 1 - Stores the sum of all the fitness in the population
-    total_fitness = functools.reduce(lambda total, w: total + int(w), chromosome_fitness)
+    total_fitness = population.total_fitness
 
     for pair in range(num_of_pairs):
         parent = []
-        fit = []
         # 2 -Generating a random witness between 0 and sum of all fitness values
-        random_fitness = random.randint(0, (total_fitness+1))
-        iterations = 0
-        while len(parent) < 2 and iterations < len(chromosomes):
-            chromosome_index = 0
-            cumulative_fitness = 0
-            for fitness_value in chromosome_fitness:
-                cumulative_fitness += fitness_value
-                if cumulative_fitness >= random_fitness:
-                    if chromosomes[chromosome_index] in parent:
-                        chromosome_index += 1
-                        continue
-                    # 3 - Selecting the first chromosome that is not already a parent and the fitness when added
-                    #     to the cumulative sum of previous chromosomes is greater than the random firness
-                    else:
-                        parent.append(chromosomes[chromosome_index])
-                        fit.append(fitness_value)
-                        chromosome_index += 1
-                        break
-                chromosome_index += 1
-            iterations += 1
+        random_fitness = rng.randint(0, (total_fitness+1))
+
+        # 3 - Selecting the first chromosome whose fitness when added to the cumulative sum of
+        #     previous chromosomes is greater than the random fitness, and the next one that is not
+        #     already a parent
+        chromosome_index = population.select(random_fitness)
+        if chromosome_index < len(population):
+            parent.append(chromosome_index)
+            next_index = chromosome_index + 1
+            while next_index < len(population) and chromosomes[next_index] == chromosomes[chromosome_index]:
+                next_index += 1
+            if next_index < len(population):
+                parent.append(next_index)
         parents.append(parent)
-        fitness.append(fit)
 
-    return parents, fitness
+    return parents
 
 
-def generate_children(parent_pair, operation):
+def generate_children(parent_pair, operation, rng=random):
     """
     :param parent_pair: [chromosome-1, chromosome-2] upon which the crossover will be done
+    :param rng: random.Random instance to draw from
     :return: list, list
 
     The child chromosomes are formed from either a single point crossover or two point crossover. The chance of
@@ -131,57 +375,97 @@ def generate_children(parent_pair, operation):
     first_child = None
     second_child = None
     if len(parent_pair) == 2:
-        if operation == "single":
-            cut_point = random.randint(0, int(len(parent_pair[0])/2))
-            first_child = parent_pair[0][:cut_point] + parent_pair[1][cut_point:]
-            second_child = parent_pair[1][:cut_point] + parent_pair[0][cut_point:]
-
-        else:
-            if len(parent_pair[1]) > len(parent_pair[0]):
-                size = len(parent_pair[0])
-                if size == 1:
-                    first_point = 0
-                else:
-                    first_point = random.randint(0, int(len(parent_pair[0])/2))
-                second_point = random.randint(first_point, len(parent_pair[0]))
-            else:
-                size = len(parent_pair[1])
-                if size == 1:
-                    first_point = 0
-                else:
-                    first_point = random.randint(0, int(len(parent_pair[1])/2))
-                second_point = random.randint(first_point, len(parent_pair[1]))
-
-            first_child = parent_pair[0][:first_point] + \
-                parent_pair[1][first_point:second_point] + \
-                parent_pair[0][second_point:]
-            second_child = parent_pair[1][:first_point] + \
-                parent_pair[0][first_point:second_point] + \
-                parent_pair[1][second_point:]
+        first_point, second_point = crossover_points(parent_pair, operation, rng)
+        first_child = parent_pair[0][:first_point] + \
+            parent_pair[1][first_point:second_point] + \
+            parent_pair[0][second_point:]
+        second_child = parent_pair[1][:first_point] + \
+            parent_pair[0][first_point:second_point] + \
+            parent_pair[1][second_point:]
 
     return first_child, second_child
 
 
-def mutate(child, mutation_prob, current_configuration):
+def crossover_points(parent_pair, operation, rng=random):
+    """
+    :param parent_pair: [chromosome-1, chromosome-2] upon which the crossover will be done
+    :return: first_point, second_point
+
+    The children swap the genes of the parents between the two points. A single point crossover
+    swaps everything after its cut point, its second point is past the end of both parents
+    """
+    if operation == "single":
+        cut_point = rng.randint(0, int(len(parent_pair[0])/2))
+        return cut_point, max(len(parent_pair[0]), len(parent_pair[1]))
+
+    if len(parent_pair[1]) > len(parent_pair[0]):
+        size = len(parent_pair[0])
+    else:
+        size = len(parent_pair[1])
+    if size == 1:
+        first_point = 0
+    else:
+        first_point = rng.randint(0, int(size/2))
+    second_point = rng.randint(first_point, size)
+    return first_point, second_point
+
+
+def mutate(child, mutation_prob, current_configuration, rng=random):
     """
     
     :param child: child chromosome to mutate
     :param mutation_prob: 
     :param current_configuration: 
+    :param rng: random.Random instance to draw from
     :return: the mutated child
     """
-    current_rate = 1.0/random.randrange(1, len(child)+1)
-    while current_rate == 0:
-        current_rate = 1.0 / random.randrange(1, len(child)+1)
-
-    # if the current _rate is grater than mutation prob, a gene from the child is fliped value
-    if current_rate > mutation_prob:
-        gene_to_mutate = random.randint(0, len(child)-1)
+    gene_to_mutate = mutation_point(len(child), mutation_prob, rng)
+    if gene_to_mutate is not None:
         var = abs(child[gene_to_mutate])-1
         current_configuration[var] = not current_configuration[var]
     return child
 
 
+def mutation_point(length, mutation_prob, rng=random):
+    """
+    :param length: number of genes of the child
+    :return: index of the gene to mutate, None if the child is not mutated
+
+    A random rate 1/k, k in 1..length, is drawn; if it is greater than the mutation probability
+    a gene from the child is chosen at random to have its value flipped
+    """
+    current_rate = 1.0/rng.randrange(1, length+1)
+    while current_rate == 0:
+        current_rate = 1.0 / rng.randrange(1, length+1)
+
+    if current_rate > mutation_prob:
+        return rng.randint(0, length-1)
+    return None
+
+
+def mutate_genotype(genotype, mutation_prob, rng=random):
+    """
+    :param genotype: values of the variables of the genes of a child, mutated in place
+    :param mutation_prob:
+    :param rng: random.Random instance to draw from
+    :return: the mutated genotype
+
+    Same rule as mutate, but the value of the gene is flipped in the genotype of the child
+    instead of in the configuration shared by the whole population
+    """
+    gene_to_mutate = mutation_point(len(genotype), mutation_prob, rng)
+    if gene_to_mutate is not None:
+        genotype[gene_to_mutate] ^= 1
+    return genotype
+
+
+def genotype_of(chromosome, current_configuration):
+    """
+    :return: bytearray with the value (0/1) of the variable of every gene of the chromosome
+    """
+    return bytearray(1 if current_configuration[abs(gene)-1] else 0 for gene in chromosome)
+
+
 # Fitness is calculated based on the average of fitness of the two parents and the count of positive genes
 def calculate_fitness(child, fitness_pair, current_configuration):
     """
@@ -206,3 +490,65 @@ def calculate_fitness(child, fitness_pair, current_configuration):
     if (fitness > 0) and fitness < math.pow(2, 63):
         return fitness
     return average_fitness
+
+
+def calculate_fitness_batch(children, fitness_pair, current_configuration):
+    """
+    :param children: mutated child chromosomes whose fitness is to be calculated
+    :param fitness_pair: list of fitness values of the parent chromosomes
+    :param current_configuration: current configuration of the variables
+    :return: list with the fitness of every child chromosome
+
+    Same as calculate_fitness but the genes of all the children are evaluated at once with NumPy
+    """
+    average_fitness = int((fitness_pair[0] + fitness_pair[1])/2)
+    children_fitness = list()
+    for fitness in vectorized.chromosome_fitness(children, current_configuration).tolist():
+        if (fitness > 0) and fitness < math.pow(2, 63):
+            children_fitness.append(fitness)
+        else:
+            children_fitness.append(average_fitness)
+    return children_fitness
+
+
+def calculate_genotype_fitness(child, genotype, fitness_pair):
+    """
+    :param child: child chromosome whose fitness is to be calculated
+    :param genotype: values of the variables of the genes of the child
+    :param fitness_pair: list of fitness values of the parent chromosomes
+    :return: the fitness of the child chromosome
+
+    Same rule as calculate_fitness with the values taken from the genotype of the child
+    """
+    average_fitness = int((fitness_pair[0] + fitness_pair[1])/2)
+    fitness = 0
+    for gene, value in zip(child, genotype):
+        if value == (gene > 0):
+            fitness += abs(gene)
+        else:
+            fitness -= int(abs(gene)/2)
+
+    if (fitness > 0) and fitness < math.pow(2, 63):
+        return fitness
+    return average_fitness
+
+
+def calculate_genotype_fitness_batch(children, genotypes, fitness_pairs, use_numpy=False):
+    """
+    :param children: child chromosomes of a whole generation
+    :param genotypes: genotype of every child
+    :param fitness_pairs: fitness values of the parents of every child
+    :param use_numpy: score every gene of every child in one vectorized pass
+    :return: list with the fitness of every child chromosome
+    """
+    if not use_numpy or not children:
+        return [calculate_genotype_fitness(child, genotype, fitness_pair)
+                for child, genotype, fitness_pair in zip(children, genotypes, fitness_pairs)]
+
+    children_fitness = list()
+    for fitness, fitness_pair in zip(vectorized.genotype_fitness(children, genotypes).tolist(), fitness_pairs):
+        if (fitness > 0) and fitness < math.pow(2, 63):
+            children_fitness.append(fitness)
+        else:
+            children_fitness.append(int((fitness_pair[0] + fitness_pair[1])/2))
+    return children_fitness
@@ -1,97 +1,367 @@
 import localsearch
+import clausedb
+import bitassign
+import checkpoint
+import vectorized
 import random
 import time
+from array import array
+from trajectory import Trajectory
 
 
-def join_clause(clause):
+# Number of flips between two checks of the stop event of a restart
+STOP_CHECK_INTERVAL = 256
+
+# Trajectories of solve(), in the order it returns them
+TRAJECTORIES = ("clauses_sat", "random_walk", "choose_and_flip")
+
+
+class AdaptiveNoise:
     """
-    :param clause:
-    :return: string
+    AdaptiveNoise(num_clauses, theta=1/6, phi=0.2)
 
-    Takes in array in the form of [25, 32, 44, 50]
-    and returns "25 32 44 50"
+    Adaptive noise mechanism of Hoos (2002) for the random walk probability.
+    The probability starts at 0. If the number of satisfied clauses has not
+    improved since the last adaptation for theta * num_clauses flips, the
+    search is stagnating and the probability is raised by phi * (1 - wp);
+    every improvement lowers it by wp * phi / 2. `adaptations` counts the
+    changes and `trajectory` is a trajectory.Trajectory of the probability
+    after every flip, so its memory is bounded however long the run is
     """
-    return ' '.join(str(individual) for individual in clause)
 
+    def __init__(self, num_clauses, theta=1/6, phi=0.2):
+        self.wp = 0.0
+        self.phi = phi
+        self.stagnation = max(1, int(theta * num_clauses))
+        self.flips = 0
+        self.last_adaptation = 0
+        self.last_num_sat_clauses = 0
+        self.adaptations = 0
+        self.trajectory = Trajectory(time.time(), typecode="d")
+
+    def restart(self, num_sat_clauses):
+        """
+        A restart starts a new trajectory, the learnt probability is kept
+        """
+        self.last_adaptation = self.flips
+        self.last_num_sat_clauses = num_sat_clauses
 
-def solve(num_vars, clauses, num_flips, wp, steps=50):
+    def update(self, num_sat_clauses):
+        """
+        update(num_sat_clauses) -> wp for the next flip
+        """
+        self.flips += 1
+        if num_sat_clauses > self.last_num_sat_clauses:
+            self.wp -= self.wp * self.phi / 2
+        elif self.flips - self.last_adaptation > self.stagnation:
+            self.wp += (1 - self.wp) * self.phi
+        else:
+            self.trajectory.record(self.wp)
+            return self.wp
+        self.adaptations += 1
+        self.last_adaptation = self.flips
+        self.last_num_sat_clauses = num_sat_clauses
+        self.trajectory.record(self.wp)
+        return self.wp
+
+
+def solve(num_vars, clauses, num_flips, wp, steps=50, backend="python", seed=None, restore=None, noise=None,
+          tenure=0, checkpointer=None):
     """
-    Solve(num_vars, clauses, num_flips, wp, steps) -> [bool,...]
+    Solve(num_vars, clauses, num_flips, wp, steps, backend, seed, restore, noise, tenure, checkpointer)
+        -> clauses_sat, random_walk, choose_and_flip
     Try to find an interpretation that satisfies the given formula.
-    The solution is composed by list of boolean values
+    The solution is composed by list of boolean values and printed
+
+    The satisfied clauses of every flip are recorded in trajectory.Trajectory
+    objects of fixed size: every flip (clauses_sat) and the random walk and
+    choose and flip moves of the first restart
     Note: there can't be repeated clauses or literals into a clause in the
     formula
 
+    `backend` selects how each restart evaluates the whole formula, "python"
+    or "numpy" (see vectorized.py). The restarts stop as soon as one of them
+    satisfies every clause; portfolio.solve runs them in parallel
+
+    Every random decision is drawn from a random.Random(seed), so two runs
+    with the same seed follow the same flip trajectory
+
+    `restore` maps a configuration back to the variables of the original
+    formula when `clauses` was simplified, see preprocess.py; the solution
+    or best configuration is also printed over the original variables
+
+    With an AdaptiveNoise as `noise` the random walk probability is adapted
+    online and `wp` is ignored; the noise trajectory is left in the object
+
+    `tenure` is the tabu tenure of the greedy move, see
+    localsearch.select_variable
+
+    With a checkpoint.Checkpointer the state of the search is saved inside
+    the restarts, every STOP_CHECK_INTERVAL flips once `checkpointer.interval`
+    seconds have passed, and once at the end. If the checkpointer holds a
+    "gwsat" state the search continues from it, from the flip where it was
+    saved, and follows the same trajectory as a run that was never interrupted
+
     """
-    max_sat_clauses = 0
     print("c Applying GWSAT")
-    clauses_sat = list()
-    time_values = list()
-    random_walk_result = list()
-    random_walk_time = list()
-    choose_and_flip_result = list()
-    choose_and_flip_time = list()
     solution_found = False
+    best_configuration = None
+    best_sat_clauses = -1
+
+    # The clause database and occurrence index are built once and reused by every restart
+    database = clausedb.as_database(num_vars, clauses)
+    evaluator = localsearch.IncrementalEvaluator(database, vectorized.load_backend(backend, database))
 
-    start = time.time()
-    for current_step in range(steps):
-        current_configuration = localsearch.random_value_assignment(num_vars)
-        list_sat_clauses = {join_clause(clause): 0 for clause in clauses}
-        num_sat_clauses, list_sat_clauses = localsearch.initialize_clause_data(
-            clauses,
-            current_configuration,
-            list_sat_clauses)
-        for flip in range(num_flips):
-            random_prob = random.random()
-            # Execute Random walk or Choose and Flip
-            # based on random probability generated
-            if random_prob < wp:
-                current_configuration, num_sat_clauses, list_sat_clauses = random_walk(
-                    clauses,
-                    current_configuration,
-                    list_sat_clauses)
-                operation = "random walk"
-                if current_step == 0:
-                    random_walk_result.append(num_sat_clauses)
-                    random_walk_time.append((time.time()-start))
+    rng = random.Random(seed)
+    first_step = 0
+    elapsed = 0.0
+    state = None if checkpointer is None else checkpointer.state("gwsat")
+    if state is not None:
+        elapsed = state[0]["elapsed"]
+    # Times continue from those of the checkpoint
+    start = time.time() - elapsed
+    trajectories = [Trajectory(start) for _ in TRAJECTORIES]
+    resume = None
+    if state is not None:
+        first_step, elapsed, solution_found, best_configuration, best_sat_clauses = \
+            resume_state(state, num_vars, rng, noise, trajectories)
+        if solution_found or first_step == steps:
+            print("c The checkpoint holds a finished GWSAT run")
+        else:
+            resume = resume_restart(state, evaluator)
+            if resume is None:
+                print("c Resuming GWSAT at restart ", first_step + 1, " of ", steps)
             else:
-                current_configuration, num_sat_clauses, list_sat_clauses = localsearch.choose_and_flip(
-                    clauses,
-                    current_configuration,
-                    list_sat_clauses
-                )
-                operation = "choose and flip"
-                if current_step == 0:
-                    choose_and_flip_time.append((time.time()-start))
-                    choose_and_flip_result.append(num_sat_clauses)
-
-            if num_sat_clauses > max_sat_clauses or num_sat_clauses == len(clauses):
-                max_sat_clauses = num_sat_clauses
-                solution_found = True
-                # Solution found if the max number of satisfied clauses equals the number of satisfied
-                # clauses in the input file
-                if max_sat_clauses == len(clauses):
-                    print("s Satifiable")
-                    print("operation: ", operation)
-                    print("solution found at flip number: ", flip)
-                    print("solution config: ", current_configuration)
+                print("c Resuming GWSAT at restart ", first_step + 1, " of ", steps, ", flip ", resume[0])
+    next_step = first_step
+    for current_step in range(steps if solution_found else first_step, steps):
+        if resume is None:
+            current_configuration = localsearch.random_value_assignment(num_vars, rng)
+            evaluator.reset(current_configuration)
+        save = None
+        if checkpointer is not None:
+            def save(flip, max_sat_clauses, best, current_step=current_step):
+                if checkpointer.due():
+                    checkpointer.save("gwsat", *checkpoint_state(
+                        current_step, time.time() - start, solution_found, best_configuration, best_sat_clauses,
+                        rng, noise, trajectories, (flip, max_sat_clauses, best, evaluator)))
+        solution_found, *_, configuration, num_sat_clauses = restart(
+            evaluator, num_flips, wp, start, record_moves=current_step == 0, rng=rng, noise=noise, tenure=tenure,
+            trajectories=trajectories, save=save, resume=resume)
+        resume = None
+        next_step = current_step + 1
+
+        if num_sat_clauses > best_sat_clauses:
+            best_configuration, best_sat_clauses = configuration, num_sat_clauses
+        if solution_found:
+            break
+
+    if checkpointer is not None:
+        checkpointer.save("gwsat", *checkpoint_state(next_step, time.time() - start, solution_found,
+                                                     best_configuration, best_sat_clauses, rng, noise, trajectories))
+        checkpointer.report(time.time() - start)
+    if not solution_found:
+        print("u Unsatisfiable configuration in ", num_flips)
+        print("c Best configuration satisfies ", best_sat_clauses, " of ", len(database), " clauses: ",
+              best_configuration)
+    if restore is not None:
+        print("c Configuration over the original variables: ", restore(best_configuration))
+    if noise is not None:
+        noise.trajectory.finish()
+        print("c Final walk probability ", noise.wp, " after ", noise.adaptations, " adaptations")
 
-            if not solution_found:
-                print("u Unsatisfiable configuration in ", num_flips)
-            end = time.time()
-            time_values.append(end-start)
-            clauses_sat.append(num_sat_clauses)
+    return tuple(trajectories)
 
-        return time_values, clauses_sat, random_walk_time, random_walk_result, choose_and_flip_time, \
-            choose_and_flip_result
 
+def checkpoint_state(next_step, elapsed, solution_found, best_configuration, best_sat_clauses, rng, noise,
+                     trajectories, restart_state=None):
+    """
+    checkpoint_state(...) -> metadata, arrays for checkpoint.Checkpointer.save
+
+    State of solve() before restart `next_step`: the random generator, the
+    best configuration, the adaptive noise and the trajectories. With
+    `restart_state`, (flip, max_sat_clauses, best, evaluator) of restart
+    `next_step` in progress, also the state of that restart: the flip to
+    run next, the current assignment, the tabu flip times, the order of
+    the falsified clauses (the random clause picks depend on it) and the
+    bitassign.BestSoFar of the restart. The clause counts are rebuilt from
+    the assignment on resume, see resume_restart
+    """
+    metadata, internal = checkpoint.rng_state(rng)
+    metadata.update({"next_step": next_step, "elapsed": elapsed, "solution_found": solution_found,
+                     "best_sat_clauses": best_sat_clauses})
+    arrays = {"rng": internal}
+    if best_configuration is not None:
+        arrays["best_configuration"] = array("B", best_configuration.bits)
+    for name, trajectory in zip(TRAJECTORIES, trajectories):
+        trajectory_metadata, trajectory_arrays = trajectory.state(name)
+        metadata.update(trajectory_metadata)
+        arrays.update(trajectory_arrays)
+    if noise is not None:
+        metadata["noise"] = [noise.wp, noise.flips, noise.last_adaptation, noise.last_num_sat_clauses,
+                             noise.adaptations]
+        noise_metadata, noise_arrays = noise.trajectory.state("noise_wp")
+        metadata.update(noise_metadata)
+        arrays.update(noise_arrays)
+    if restart_state is not None:
+        flip, max_sat_clauses, best, evaluator = restart_state
+        falsified = evaluator.falsified
+        metadata["restart"] = [flip, max_sat_clauses, evaluator.flips, best.best_length, best.log_valid,
+                               best.num_sat_clauses]
+        arrays.update({"assignment": array("B", map(bool, evaluator.configuration)),
+                       "flip_time": evaluator.flip_time, "falsified": falsified.clauses[:falsified.size],
+                       "best_anchor": array("B", best.anchor.bits), "best_log": array("q", best.log)})
+    return metadata, arrays
+
+
+def resume_restart(state, evaluator):
+    """
+    resume_restart(state, evaluator) -> (flip, max_sat_clauses, best) for restart(), None if
+    the state was saved between two restarts
 
-def random_walk(clauses, current_configuration, list_sat_clauses):
+    Rebuilds the evaluator from the saved assignment, then puts back its
+    flip times and the order of its falsified clauses
     """
-    :param clauses:
-    :param current_configuration:
-    :param list_sat_clauses:
-    :return:
+    metadata, arrays = state
+    if "restart" not in metadata:
+        return None
+    flip, max_sat_clauses, flips, best_length, log_valid, best_sat_clauses = metadata["restart"]
+    evaluator.reset([bool(value) for value in arrays["assignment"]])
+    evaluator.flips = flips
+    evaluator.flip_time = arrays["flip_time"]
+    falsified = evaluator.falsified
+    falsified.clear()
+    for index in arrays["falsified"]:
+        falsified.add(index)
+
+    best = bitassign.BestSoFar(evaluator.configuration, best_sat_clauses)
+    best.anchor = bitassign.BitAssignment(evaluator.num_vars, bytearray(arrays["best_anchor"]))
+    best.log = arrays["best_log"].tolist()
+    best.best_length = best_length
+    best.log_valid = log_valid
+    return flip, max_sat_clauses, best
+
+
+def resume_state(state, num_vars, rng, noise, trajectories):
+    """
+    resume_state(state, num_vars, rng, noise, trajectories)
+        -> next_step, elapsed, solution_found, best_configuration, best_sat_clauses
+
+    Loads a state of checkpoint_state() back into the random generator, the
+    noise and the (empty) trajectories
+    """
+    metadata, arrays = state
+    checkpoint.set_rng_state(rng, metadata, arrays["rng"])
+    for name, trajectory in zip(TRAJECTORIES, trajectories):
+        trajectory.load(name, metadata, arrays)
+    if noise is not None and "noise" in metadata:
+        noise.wp, noise.flips, noise.last_adaptation, noise.last_num_sat_clauses, noise.adaptations = \
+            metadata["noise"]
+        noise.trajectory.load("noise_wp", metadata, arrays)
+    best_configuration = None
+    if "best_configuration" in arrays:
+        best_configuration = bitassign.BitAssignment(num_vars, bytearray(arrays["best_configuration"]))
+    return metadata["next_step"], metadata["elapsed"], metadata["solution_found"], best_configuration, \
+        metadata["best_sat_clauses"]
+
+
+def restart(evaluator, num_flips, wp, start, record_moves=True, stop=None, rng=random, noise=None, tenure=0,
+            trajectories=None, verbose=True, save=None, resume=None):
+    """
+    restart(evaluator, num_flips, wp, start, record_moves, stop, rng, noise, tenure, trajectories, verbose,
+            save, resume)
+        -> solution_found, clauses_sat, random_walk, choose_and_flip, best_configuration, best_sat_clauses
+
+    Runs one GWSAT restart of at most `num_flips` flips from the configuration
+    loaded in `evaluator`. The satisfied clauses of every flip are recorded in
+    the three trajectory.Trajectory of `trajectories` (new ones timed from
+    `start` by default), which are returned. The random walk and
+    choose and flip moves are only recorded if `record_moves` is set. `stop`
+    is an optional multiprocessing.Event; the restart gives up once it is set.
+    Random decisions are drawn from `rng`. The best configuration of the
+    restart is returned as a bitassign.BitAssignment. With an AdaptiveNoise
+    as `noise` its probability replaces `wp`. `tenure` is the tabu tenure of
+    the choose and flip move. The solution is printed when it is found unless
+    `verbose` is False.
+
+    `save(flip, max_sat_clauses, best)` is called every STOP_CHECK_INTERVAL
+    flips, before flip `flip`, see solve. `resume`, (flip, max_sat_clauses,
+    best) from resume_restart, continues a restart loaded in `evaluator` at
+    that flip instead of starting one
+    """
+    max_sat_clauses = 0
+    first_flip = 0
+    num_clauses = len(evaluator.database)
+    if trajectories is None:
+        trajectories = [Trajectory(start) for _ in TRAJECTORIES]
+    clauses_sat, random_walk_moves, choose_and_flip_moves = trajectories
+    solution_found = False
+    next_random = rng.random
+    evaluator.last_flipped = 0
+    if resume is not None:
+        first_flip, max_sat_clauses, best = resume
+    else:
+        best = bitassign.BestSoFar(evaluator.configuration, evaluator.num_sat_clauses)
+        if noise is not None:
+            noise.restart(evaluator.num_sat_clauses)
+    if noise is not None:
+        wp = noise.wp
+
+    for flip in range(first_flip, num_flips):
+        if flip % STOP_CHECK_INTERVAL == 0:
+            if stop is not None and stop.is_set():
+                break
+            if save is not None:
+                save(flip, max_sat_clauses, best)
+        random_prob = next_random()
+        # Execute Random walk or Choose and Flip
+        # based on random probability generated
+        if random_prob < wp:
+            current_configuration, num_sat_clauses = random_walk(evaluator, rng)
+            operation = "random walk"
+            if record_moves:
+                random_walk_moves.record(num_sat_clauses)
+        else:
+            current_configuration, num_sat_clauses = localsearch.choose_and_flip(evaluator, rng, tenure)
+            operation = "choose and flip"
+            if record_moves:
+                choose_and_flip_moves.record(num_sat_clauses)
+
+        clauses_sat.record(num_sat_clauses)
+        if evaluator.last_flipped:
+            best.flipped(evaluator.last_flipped)
+            evaluator.last_flipped = 0
+        if num_sat_clauses > best.num_sat_clauses:
+            best.improved(current_configuration, num_sat_clauses)
+        if noise is not None:
+            wp = noise.update(num_sat_clauses)
+
+        if num_sat_clauses > max_sat_clauses:
+            max_sat_clauses = num_sat_clauses
+            # Solution found if the max number of satisfied clauses equals the number of satisfied
+            # clauses in the input file
+            if max_sat_clauses == num_clauses:
+                solution_found = True
+                if not verbose:
+                    break
+                print("s Satifiable")
+                print("operation: ", operation)
+                print("solution found at flip number: ", flip)
+                print("solution config: ", current_configuration)
+                break
+
+    clauses_sat.finish()
+    if record_moves:
+        random_walk_moves.finish()
+        choose_and_flip_moves.finish()
+    return solution_found, clauses_sat, random_walk_moves, choose_and_flip_moves, best.best(), best.num_sat_clauses
+
+
+def random_walk(evaluator, rng=random):
+    """
+    :param evaluator: localsearch.IncrementalEvaluator holding the current configuration
+    :param rng: random.Random instance to draw from
+    :return: current_configuration, num_sat_clauses
 
     Selects a variable using random walk approach, flips its value and returns the result of
     the variable switch to the calling function
@@ -99,20 +369,14 @@ def random_walk(clauses, current_configuration, list_sat_clauses):
 
     random_gene = 0
 
-    # Iterating over the list of clauses to find an unsatisfied clause
+    # Picking an unsatisfied clause uniformly at random
     # and selecting a random individual from the clause
-    for clause in list_sat_clauses.keys():
-        if list_sat_clauses[clause] == 0:
-            random_gene = abs(int(random.sample(list(clause.split()), 1)[0]))
-            break
-
-    new_configuration = current_configuration.copy()
+    index = evaluator.falsified.random_clause(rng)
+    if index >= 0:
+        random_gene = abs(rng.choice(evaluator.database.clause(index)))
 
     # Reversing the value of the random gene that's selected
-    new_configuration[random_gene-1] = not new_configuration[random_gene-1]
+    if random_gene:
+        evaluator.flip(random_gene)
 
-    return localsearch.get_result_of_input_change_in_clauses(
-        clauses,
-        new_configuration,
-        list_sat_clauses
-    )
\ No newline at end of file
+    return evaluator.configuration, evaluator.num_sat_clauses
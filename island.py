@@ -0,0 +1,175 @@
+import multiprocessing
+import os
+import random
+import time
+import ga
+import localsearch
+import vectorized
+from population import Population
+
+
+def split_population(chromosomes, chromosome_fitness, islands):
+    """
+    split_population(chromosomes, chromosome_fitness, islands) -> list of (chromosomes, chromosome_fitness)
+
+    Deals the individuals round robin to the islands, so every island gets a
+    similar share of the population
+    """
+    return [(chromosomes[island::islands], chromosome_fitness[island::islands]) for island in range(islands)]
+
+
+def best_individuals(population, genotypes, count):
+    """
+    best_individuals(population, genotypes, count) -> list of (chromosome, fitness, genotype)
+
+    Copies of the `count` fittest individuals of an island, the migrants it
+    sends to the next island
+    """
+    fittest = sorted(range(len(population)), key=population.chromosome_fitness.__getitem__, reverse=True)
+    return [(list(population.chromosomes[index]), population.chromosome_fitness[index],
+             genotypes[index] if genotypes is not None else None)
+            for index in fittest[:count]]
+
+
+def receive_migrants(population, genotypes, migrants):
+    """
+    Every migrant takes the place of the worst individual of the island if
+    it is fitter
+    """
+    for chromosome, fitness, genotype in migrants:
+        worst_fitness, worst_index = population.worst()
+        if fitness > worst_fitness:
+            population.replace(worst_index, chromosome, fitness)
+            if genotypes is not None:
+                genotypes[worst_index] = genotype
+
+
+def run_island(island, chromosomes, chromosome_fitness, num_genes, operation, generations, seed, backend,
+               batch, target, migration_interval, migrants, inbox, outbox, stop, results):
+    """
+    Evolves one island in its own process with the generation step of ga.py.
+    Every `migration_interval` generations its best `migrants` individuals are
+    sent to the next island of the ring and the ones waiting from the previous
+    island are taken in. The island sets `stop` when it breeds a child whose
+    fitness reaches `target`, and stops as soon as any island has set it. The
+    series of the island are put in `results`
+    """
+    rng = random.Random(seed)
+    use_numpy = vectorized.select_backend(backend) == "numpy"
+    current_configuration = localsearch.random_value_assignment(num_genes, rng)
+    mutation_rate = 1 / len(chromosomes)
+    population = Population(chromosomes, chromosome_fitness)
+    genotypes = None
+    if batch:
+        genotypes = [ga.genotype_of(chromosome, current_configuration) for chromosome in chromosomes]
+
+    fitness_values = list()
+    time_values = list()
+    reached = False
+    start = time.time()
+    for generation in range(generations):
+        if stop.is_set():
+            break
+        # The children of the generation are the individuals that are not in this copy
+        previous = list(population.chromosomes) if target else None
+        if batch:
+            ga.evolve_generation_batch(population, genotypes, ga.NUM_OF_PAIRS, operation, mutation_rate, rng,
+                                       use_numpy)
+        else:
+            ga.evolve_generation(population, current_configuration, ga.NUM_OF_PAIRS, operation, mutation_rate,
+                                 rng, use_numpy)
+        fitness_values.append(population.total_fitness)
+        time_values.append(time.time() - start)
+
+        if target and any(fitness >= target for chromosome, old, fitness in
+                          zip(population.chromosomes, previous, population.chromosome_fitness)
+                          if chromosome is not old):
+            reached = True
+            stop.set()
+            break
+
+        if (generation + 1) % migration_interval == 0:
+            outbox.send(best_individuals(population, genotypes, migrants))
+            while inbox.poll():
+                receive_migrants(population, genotypes, inbox.recv())
+
+    results.put((island, fitness_values, time_values, max(population.chromosome_fitness), reached))
+
+
+def merge_series(series):
+    """
+    merge_series(series) -> fitness_values, time_values
+
+    Adds up the total fitness of every island generation by generation. The
+    time of a generation is the time of the slowest island. Islands that
+    stopped early keep their last total
+    """
+    fitness_values = list()
+    time_values = list()
+    for generation in range(max((len(fitness) for _, fitness, _ in series), default=0)):
+        total = 0
+        moment = 0
+        for _, fitness, times in series:
+            if fitness:
+                last = min(generation, len(fitness) - 1)
+                total += fitness[last]
+                moment = max(moment, times[last])
+        fitness_values.append(total)
+        time_values.append(moment)
+    return fitness_values, time_values
+
+
+def solve(chromosomes, num_genes, chromosome_fitness, operation, generations=50, backend="python", seed=None,
+          batch=False, islands=None, migration_interval=5, migrants=2, target=None):
+    """
+    solve(chromosomes, num_genes, chromosome_fitness, operation, generations, backend, seed, batch,
+          islands, migration_interval, migrants, target) -> same series as ga.solve
+
+    Island model version of ga.solve: the population is split into `islands`
+    sub-populations (one per core by default) that evolve in separate
+    processes, each with its own seed derived from `seed`. The islands form a
+    ring connected by pipes and send their best `migrants` individuals to the
+    next one every `migration_interval` generations. Every island stops as
+    soon as one of them breeds a child whose fitness reaches `target` (the
+    top weight of the wcnf file), otherwise after `generations`. Only the
+    children count: the initial individuals are clauses and those of weight
+    `target` would reach it before any generation.
+
+    The fitness series is the sum of the total fitness of the islands
+    """
+    print("c Applying GA island model using ", operation)
+    islands = max(1, min(islands or os.cpu_count() or 1, len(chromosomes) // 2))
+    base_seed = random.randrange(2**32) if seed is None else seed
+
+    context = multiprocessing.get_context()
+    stop = context.Event()
+    results = context.Queue()
+    # pipes[island] carries the migrants from island to island + 1
+    pipes = [context.Pipe(duplex=False) for _ in range(islands)]
+    processes = list()
+    for island, (island_chromosomes, island_fitness) in enumerate(split_population(chromosomes, chromosome_fitness,
+                                                                                   islands)):
+        inbox = pipes[island - 1][0]
+        outbox = pipes[island][1]
+        processes.append(context.Process(target=run_island,
+                                         args=(island, island_chromosomes, island_fitness, num_genes, operation,
+                                               generations, base_seed + island, backend, batch, target,
+                                               migration_interval, migrants, inbox, outbox, stop, results)))
+    for process in processes:
+        process.start()
+
+    series = list()
+    for _ in processes:
+        island, fitness_values, time_values, best_fitness, reached = results.get()
+        if reached:
+            print("c Island ", island, " reached the target fitness ", target, " in generation ",
+                  len(fitness_values))
+        series.append((island, fitness_values, time_values))
+    for process in processes:
+        process.join()
+
+    fitness_values, time_values = merge_series(sorted(series))
+    generations_run = sum(len(fitness) for _, fitness, _ in series)
+    if time_values and time_values[-1] > 0:
+        print("c Island generations per second: ", generations_run / time_values[-1])
+    return fitness_values, time_values
@@ -1,83 +1,500 @@
-from random import choice
+from array import array
 import random
 
 
-def random_value_assignment(num_vars):
+def random_value_assignment(num_vars, rng=random):
     """
-    random_value_assignment(num_vars:int): [boolean]
+    random_value_assignment(num_vars:int, rng): [boolean]
 
     Creates a random interpretation for this formula, starting with None to
     mach the range of values on the formula: [-num_vars, -1] U [1, num_vars]
+
+    `rng` is the random.Random instance to draw from, the global random module
+    by default
     """
     values = []
+    choice = rng.choice
     for i in range(num_vars):
         values.append(choice([True, False]))
     return values
 
 
-def initialize_clause_data(clauses, current_config, list_sat_clauses):
+def initialize_clause_data(database, current_config, true_count, backend=None):
     """
-    initialize_clause_data(clauses, current_config, list_sat_clauses) -> num_sat_clauses, list_sat_clauses
+    initialize_clause_data(database, current_config, true_count, backend) -> num_sat_clauses, true_count
 
     Initialize the number of sat literals per clause and counts the number of
-    satisified clauses
+    satisified clauses. `true_count` is an integer array indexed by clause id,
+    see clausedb.ClauseDatabase.new_counts(). If `backend` is a
+    vectorized.NumpyFormula the literals are evaluated with NumPy
     """
+    if backend is not None:
+        counts = backend.clause_counts(current_config).tolist()
+        true_count[:] = array('i', counts)
+        return len(counts) - counts.count(0), true_count
+
     num_sat_clauses = 0
+    literals = database.literals
+    offsets = database.offsets
 
-    for clause in clauses:
-        parsed_clause = ' '.join(str(individual) for individual in clause)
-        for individual in clause:
-            individual = abs(individual)
-            if current_config[individual-1]:
-                num_sat_clauses += 1
-                list_sat_clauses[parsed_clause] += 1
-                break
+    for index in range(len(database)):
+        count = 0
+        for individual in literals[offsets[index]:offsets[index+1]]:
+            if current_config[abs(individual)-1] == (individual > 0):
+                count += 1
+        true_count[index] = count
+        if count:
+            num_sat_clauses += 1
 
-    return num_sat_clauses, list_sat_clauses
+    return num_sat_clauses, true_count
 
 
-def choose_and_flip(clauses, current_configuration, list_sat_clauses=None):
+def choose_and_flip(evaluator, rng=random, tenure=0):
     """
+    choose_and_flip(evaluator, rng, tenure) -> current_configuration, num_sat_clauses
+
     Chooses and flips the variable that improves or worsens less possible the
-    amount of satisfied clauses
+    amount of satisfied clauses: picks an unsatisfied clause at random and
+    flips the variable of the clause with the lowest break count, see
+    select_variable. Costs O(clause length)
     """
-    chosen_var = random.randint(0, len(current_configuration))
+    index = evaluator.falsified.random_clause(rng)
+    if index >= 0:
+        evaluator.flip(select_variable(evaluator, index, tenure))
+
+    return evaluator.configuration, evaluator.num_sat_clauses
 
-    # Choosing a unsatisfied clause
-    # for clause in list_sat_clauses.keys():
-    #     if list_sat_clauses[clause]:
-    #         tmp = clause.split()
-    #         var = random.randint(0, len(tmp)-1)
-    #         chosen_var = abs(int(tmp[var]))
 
-    new_configuration = current_configuration.copy()
-    new_configuration[chosen_var-1] = not new_configuration[chosen_var-1]
+def select_variable(evaluator, index, tenure=0):
+    """
+    select_variable(evaluator, index, tenure) -> var
 
-    return get_result_of_input_change_in_clauses(
-        clauses,
-        new_configuration,
-        list_sat_clauses
-    )
+    Returns the variable of clause `index` with the best (lowest) break
+    count. Variables flipped during the last `tenure` flips are tabu and
+    only chosen if every variable of the clause is tabu. Ties go to the
+    variable that has not been flipped for the longest time (its age, from
+    evaluator.flip_time)
+    """
+    database = evaluator.database
+    break_count = evaluator.break_count
+    flip_time = evaluator.flip_time
+    now = evaluator.flips
+    best_var = 0
+    best_key = None
+    for literal in database.literals[database.offsets[index]:database.offsets[index+1]]:
+        var = abs(literal)
+        tabu = flip_time[var] > 0 and now - flip_time[var] < tenure
+        key = (tabu, break_count[var], flip_time[var])
+        if best_key is None or key < best_key:
+            best_var = var
+            best_key = key
+    return best_var
 
 
-def get_result_of_input_change_in_clauses(clauses, new_configuration,
-                                          list_sat_clauses=None):
+class FalsifiedSet:
     """
-    Counts the number of satisfied clauses after flipping the value of 'var'
+    FalsifiedSet(num_clauses)
+
+    Indexed set of the clause ids that are currently unsatisfied. The ids are
+    kept packed at the front of `clauses` and `position[clause]` tells where
+    each one is (-1 if absent), so adding, removing (by swapping with the last
+    element) and picking a uniformly random clause are all O(1)
     """
-    new_list_sat_clauses = list_sat_clauses
-    new_num_sat_clauses = 0
-    for clause in clauses:
-        parsed_clause = ' '.join(str(individual) for individual in clause)
-        for individual in clause:
-            if (new_configuration[abs(individual)-1] and individual > 0) or \
-                    not new_configuration[abs(individual)-1] and individual < 0:
-                new_num_sat_clauses += 1
-                if len(new_list_sat_clauses) > 1:
-                    new_list_sat_clauses[parsed_clause] += 1
-                break
 
-    return new_configuration, new_num_sat_clauses, new_list_sat_clauses
+    def __init__(self, num_clauses):
+        self.clauses = array('i', [0]) * num_clauses
+        self.position = array('i', [-1]) * num_clauses
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def __contains__(self, clause):
+        return self.position[clause] >= 0
+
+    def clear(self):
+        for index in range(self.size):
+            self.position[self.clauses[index]] = -1
+        self.size = 0
+
+    def add(self, clause):
+        self.clauses[self.size] = clause
+        self.position[clause] = self.size
+        self.size += 1
+
+    def remove(self, clause):
+        index = self.position[clause]
+        self.size -= 1
+        last = self.clauses[self.size]
+        self.clauses[index] = last
+        self.position[last] = index
+        self.position[clause] = -1
+
+    def random_clause(self, rng=random):
+        """
+        Returns a clause id chosen uniformly at random, or -1 if the set is empty
+        """
+        if not self.size:
+            return -1
+        return self.clauses[rng.randrange(self.size)]
+
+
+class IncrementalEvaluator:
+    """
+    IncrementalEvaluator(database, backend=None)
+
+    Keeps the number of true literals of every clause, an index from every
+    variable to the clauses it occurs in and the break/make score of every
+    variable. Flipping a variable only visits the clauses the variable occurs
+    in, so the cost of a flip depends on the occurrences of the variable and
+    not on the size of the formula.
+
+        - true_count[clause]: true literals of the clause, indexed by clause id
+        - break_count[var]: clauses that become unsatisfied if var is flipped
+        - make_count[var]: clauses that become satisfied if var is flipped
+        - falsified: FalsifiedSet with the clauses that have no true literal
+        - last_flipped: the variable changed by the last flip
+        - flips: flips since the last reset()
+        - flip_time[var]: value of `flips` right after var was last flipped, 0 if never
+
+    The full evaluation done on reset() runs on `backend` when a
+    vectorized.NumpyFormula is given.
+    """
+
+    def __init__(self, database, backend=None):
+        self.database = database
+        self.backend = backend
+        self.last_flipped = 0
+        self.num_vars = database.num_vars
+        self.configuration = []
+        self.num_sat_clauses = 0
+        self.true_count = database.new_counts()
+        self.falsified = FalsifiedSet(len(database))
+        self.break_count = array('i', [0]) * (self.num_vars + 1)
+        self.make_count = array('i', [0]) * (self.num_vars + 1)
+        self.occ_offsets, self.occ_clauses, self.occ_literals = database.build_occurrences()
+        self.reset_flip_times()
+
+    def reset_flip_times(self):
+        self.flips = 0
+        self.flip_time = array('q', [0]) * (self.num_vars + 1)
+
+    def reset(self, current_configuration):
+        """
+        reset(current_configuration) -> num_sat_clauses
+
+        Evaluates the whole formula once for a new interpretation and
+        initialises the clause counts and the break/make scores
+        """
+        self.configuration = current_configuration
+        self.falsified.clear()
+        self.reset_flip_times()
+
+        if self.backend is not None:
+            true_count, make_count, break_count = self.backend.evaluate(current_configuration)
+            self.true_count[:] = array('i', true_count.tolist())
+            self.make_count = array('i', make_count.tolist())
+            self.break_count = array('i', break_count.tolist())
+            self.num_sat_clauses = 0
+            for index, count in enumerate(self.true_count):
+                if count:
+                    self.num_sat_clauses += 1
+                else:
+                    self.falsified.add(index)
+            return self.num_sat_clauses
+
+        self.num_sat_clauses, _ = initialize_clause_data(self.database, current_configuration, self.true_count)
+        self.break_count = array('i', [0]) * (self.num_vars + 1)
+        self.make_count = array('i', [0]) * (self.num_vars + 1)
+
+        literals = self.database.literals
+        offsets = self.database.offsets
+        for index, count in enumerate(self.true_count):
+            if count == 0:
+                self.falsified.add(index)
+                for literal in literals[offsets[index]:offsets[index+1]]:
+                    self.make_count[abs(literal)] += 1
+            elif count == 1:
+                self.break_count[self.critical_var(index)] += 1
+
+        return self.num_sat_clauses
+
+    def critical_var(self, index):
+        """
+        Returns the variable of the first true literal of the clause
+        """
+        configuration = self.configuration
+        offsets = self.database.offsets
+        for literal in self.database.literals[offsets[index]:offsets[index+1]]:
+            if configuration[abs(literal)-1] == (literal > 0):
+                return abs(literal)
+        return 0
+
+    def score(self, var):
+        """
+        Returns the change in the number of satisfied clauses if var is flipped
+        """
+        return self.make_count[var] - self.break_count[var]
+
+    def flip(self, var):
+        """
+        flip(var) -> num_sat_clauses
 
+        Flips the value of var in place and updates the clause counts and the
+        break/make scores of the clauses where var appears
+        """
+        configuration = self.configuration
+        true_count = self.true_count
+        break_count = self.break_count
+        make_count = self.make_count
+        literals = self.database.literals
+        offsets = self.database.offsets
+        occ_clauses = self.occ_clauses
+        occ_literals = self.occ_literals
 
+        configuration[var-1] = not configuration[var-1]
+        value = configuration[var-1]
+        self.last_flipped = var
+        self.flips += 1
+        self.flip_time[var] = self.flips
 
+        for position in range(self.occ_offsets[var], self.occ_offsets[var+1]):
+            index = occ_clauses[position]
+            if value == (occ_literals[position] > 0):
+                # The literal became true
+                count = true_count[index]
+                if count == 0:
+                    self.num_sat_clauses += 1
+                    self.falsified.remove(index)
+                    for other in literals[offsets[index]:offsets[index+1]]:
+                        make_count[abs(other)] -= 1
+                    break_count[var] += 1
+                elif count == 1:
+                    # The clause no longer depends on its only true literal
+                    for other in literals[offsets[index]:offsets[index+1]]:
+                        if abs(other) != var and configuration[abs(other)-1] == (other > 0):
+                            break_count[abs(other)] -= 1
+                            break
+                true_count[index] = count + 1
+            else:
+                # The literal became false
+                count = true_count[index] - 1
+                true_count[index] = count
+                if count == 0:
+                    self.num_sat_clauses -= 1
+                    self.falsified.add(index)
+                    for other in literals[offsets[index]:offsets[index+1]]:
+                        make_count[abs(other)] += 1
+                    break_count[var] -= 1
+                elif count == 1:
+                    # The remaining true literal is now critical
+                    break_count[self.critical_var(index)] += 1
+
+        return self.num_sat_clauses
+
+
+class WeightedEvaluator(IncrementalEvaluator):
+    """
+    WeightedEvaluator(database, top_weight=0, backend=None)
+
+    IncrementalEvaluator for weighted formulas (.wcnf). Every clause counts
+    with its weight instead of 1, so break_count[var] and make_count[var] hold
+    the weight of the clauses that flipping var breaks or makes and score(var)
+    is the change in satisfied weight. Clauses whose weight is >= top_weight
+    are hard: they count with hard_weight, one more than the weight of all the
+    soft clauses together, so breaking a hard clause is never compensated.
+
+        - clause_weight[clause]: weight the clause counts with
+        - cost: weight of the falsified clauses
+        - hard_falsified: number of falsified hard clauses
+    """
+
+    def __init__(self, database, top_weight=0, backend=None):
+        IncrementalEvaluator.__init__(self, database, backend)
+        weights = database.weights if database.weights is not None else [1] * len(database)
+        soft_weight = sum(weight for weight in weights if not top_weight or weight < top_weight)
+        self.hard_weight = soft_weight + 1
+        self.top_weight = top_weight
+        self.clause_weight = array('q', [self.hard_weight if top_weight and weight >= top_weight else weight
+                                         for weight in weights])
+        self.is_hard = array('b', [1 if top_weight and weight >= top_weight else 0 for weight in weights])
+        self.cost = 0
+        self.hard_falsified = 0
+
+    def reset(self, current_configuration):
+        """
+        reset(current_configuration) -> num_sat_clauses
+
+        Evaluates the whole formula once for a new interpretation and
+        initialises the clause counts, the weighted break/make scores and the
+        cost
+        """
+        self.configuration = current_configuration
+        self.falsified.clear()
+        self.reset_flip_times()
+        if self.backend is not None:
+            self.true_count[:] = array('i', self.backend.clause_counts(current_configuration).tolist())
+            self.num_sat_clauses = len(self.true_count) - self.true_count.count(0)
+        else:
+            self.num_sat_clauses, _ = initialize_clause_data(self.database, current_configuration, self.true_count)
+        self.break_count = array('q', [0]) * (self.num_vars + 1)
+        self.make_count = array('q', [0]) * (self.num_vars + 1)
+        self.cost = 0
+        self.hard_falsified = 0
+
+        literals = self.database.literals
+        offsets = self.database.offsets
+        clause_weight = self.clause_weight
+        for index, count in enumerate(self.true_count):
+            if count == 0:
+                self.falsified.add(index)
+                self.cost += clause_weight[index]
+                self.hard_falsified += self.is_hard[index]
+                for literal in literals[offsets[index]:offsets[index+1]]:
+                    self.make_count[abs(literal)] += clause_weight[index]
+            elif count == 1:
+                self.break_count[self.critical_var(index)] += clause_weight[index]
+
+        return self.num_sat_clauses
+
+    def flip(self, var):
+        """
+        flip(var) -> num_sat_clauses
+
+        Same as IncrementalEvaluator.flip with the scores and the cost moved by
+        the weight of every clause instead of 1
+        """
+        configuration = self.configuration
+        true_count = self.true_count
+        break_count = self.break_count
+        make_count = self.make_count
+        clause_weight = self.clause_weight
+        literals = self.database.literals
+        offsets = self.database.offsets
+        occ_clauses = self.occ_clauses
+        occ_literals = self.occ_literals
+
+        configuration[var-1] = not configuration[var-1]
+        value = configuration[var-1]
+        self.last_flipped = var
+        self.flips += 1
+        self.flip_time[var] = self.flips
+
+        for position in range(self.occ_offsets[var], self.occ_offsets[var+1]):
+            index = occ_clauses[position]
+            weight = clause_weight[index]
+            if value == (occ_literals[position] > 0):
+                # The literal became true
+                count = true_count[index]
+                if count == 0:
+                    self.num_sat_clauses += 1
+                    self.cost -= weight
+                    self.hard_falsified -= self.is_hard[index]
+                    self.falsified.remove(index)
+                    for other in literals[offsets[index]:offsets[index+1]]:
+                        make_count[abs(other)] -= weight
+                    break_count[var] += weight
+                elif count == 1:
+                    # The clause no longer depends on its only true literal
+                    for other in literals[offsets[index]:offsets[index+1]]:
+                        if abs(other) != var and configuration[abs(other)-1] == (other > 0):
+                            break_count[abs(other)] -= weight
+                            break
+                true_count[index] = count + 1
+            else:
+                # The literal became false
+                count = true_count[index] - 1
+                true_count[index] = count
+                if count == 0:
+                    self.num_sat_clauses -= 1
+                    self.cost += weight
+                    self.hard_falsified += self.is_hard[index]
+                    self.falsified.add(index)
+                    for other in literals[offsets[index]:offsets[index+1]]:
+                        make_count[abs(other)] += weight
+                    break_count[var] -= weight
+                elif count == 1:
+                    # The remaining true literal is now critical
+                    break_count[self.critical_var(index)] += weight
+
+        return self.num_sat_clauses
+
+    def add_weight(self, index, delta):
+        """
+        Changes the weight of clause `index` by `delta` and updates the cost
+        and the break/make scores of its variables
+        """
+        self.clause_weight[index] += delta
+        count = self.true_count[index]
+        if count == 0:
+            self.cost += delta
+            offsets = self.database.offsets
+            for literal in self.database.literals[offsets[index]:offsets[index+1]]:
+                self.make_count[abs(literal)] += delta
+        elif count == 1:
+            self.break_count[self.critical_var(index)] += delta
+
+
+def recount(evaluator):
+    """
+    recount(evaluator) -> true_count, break_count, make_count
+
+    Counts from scratch the true literals of every clause and the break/make
+    score of every variable (weighted for a WeightedEvaluator) under the
+    configuration of the evaluator, flipping every variable in turn and
+    checking the clauses it occurs in. Slow: it is the reference the
+    incremental scores are checked against, see score_errors
+    """
+    database = evaluator.database
+    configuration = list(evaluator.configuration)
+    weights = getattr(evaluator, "clause_weight", None)
+    clauses = [list(clause) for clause in database]
+    occurrences = [set() for _ in range(database.num_vars + 1)]
+    for index, clause in enumerate(clauses):
+        for literal in clause:
+            occurrences[abs(literal)].add(index)
+
+    def true_literals(clause):
+        return sum(1 for literal in clause if configuration[abs(literal)-1] == (literal > 0))
+
+    true_count = [true_literals(clause) for clause in clauses]
+    break_count = [0] * (database.num_vars + 1)
+    make_count = [0] * (database.num_vars + 1)
+    for var in range(1, database.num_vars + 1):
+        configuration[var-1] = not configuration[var-1]
+        for index in occurrences[var]:
+            weight = 1 if weights is None else weights[index]
+            satisfied = true_literals(clauses[index]) > 0
+            if true_count[index] and not satisfied:
+                break_count[var] += weight
+            elif not true_count[index] and satisfied:
+                make_count[var] += weight
+        configuration[var-1] = not configuration[var-1]
+    return true_count, break_count, make_count
+
+
+def score_errors(evaluator):
+    """
+    score_errors(evaluator) -> list of the counters of the evaluator that differ from a recount
+
+    Compares the clause counts, the break/make scores, the number of
+    satisfied clauses and the falsified set of the evaluator with recount().
+    An empty list means they all match
+    """
+    true_count, break_count, make_count = recount(evaluator)
+    errors = list()
+    for name, expected, actual in (("true_count", true_count, evaluator.true_count),
+                                   ("break_count", break_count, evaluator.break_count),
+                                   ("make_count", make_count, evaluator.make_count)):
+        for index, value in enumerate(expected):
+            if name != "true_count" and index == 0:
+                continue
+            if actual[index] != value:
+                errors.append("{}[{}] is {} instead of {}".format(name, index, actual[index], value))
+    num_sat_clauses = len(true_count) - true_count.count(0)
+    if evaluator.num_sat_clauses != num_sat_clauses:
+        errors.append("num_sat_clauses is {} instead of {}".format(evaluator.num_sat_clauses, num_sat_clauses))
+    falsified = {index for index, count in enumerate(true_count) if not count}
+    if set(evaluator.falsified.clauses[:len(evaluator.falsified)]) != falsified:
+        errors.append("the falsified set differs")
+    return errors
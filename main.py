@@ -1,19 +1,53 @@
-import gwsat
-import ga
-import sys
-import matplotlib.pyplot as plt
+import argparse
+import time
+import manifest
 
 
-def generate_plots_for_gwsat(filename):
-    clauses, num_vars = parsed_cnf_file(filename)
+# Solvers, matplotlib and NumPy are only imported by the functions that need
+# them, so the program starts parsing the input right away. Same list as
+# vectorized.BACKENDS, which imports NumPy
+BACKENDS = ["python", "numpy"]
 
-    flips = len(clauses)//2
-    time_values, clauses_sat, random_walk_time, random_walk_result, choose_and_flip_time, choose_and_flip_result = \
-        gwsat.solve(num_vars, clauses, flips, 0.4)
 
-    steps = [step + 1 for step in range(len(clauses)//2)]
+def generate_plots_for_gwsat(filename, backend="python", use_cache=False, cache_dir=None, workers=None,
+                             seed=None, run_manifest=None, simplify=False, adaptive=False, tenure=0,
+                             checkpointer=None):
+    import gwsat
+    parse_start = time.perf_counter()
+    clauses, num_vars, restore = parsed_cnf_file(filename, use_cache, cache_dir, simplify)
+    solve_start = time.perf_counter()
+
+    flips = len(clauses)//2
+    noise = gwsat.AdaptiveNoise(len(clauses)) if adaptive else None
+    if workers is None:
+        clauses_sat, random_walk, choose_and_flip = gwsat.solve(num_vars, clauses, flips, 0.4, backend=backend,
+                                                                seed=seed, restore=restore, noise=noise,
+                                                                tenure=tenure, checkpointer=checkpointer)
+    else:
+        import portfolio
+        clauses_sat, random_walk, choose_and_flip = portfolio.solve(num_vars, clauses, flips, 0.4, backend=backend,
+                                                                    workers=workers or None, seed=seed,
+                                                                    restore=restore, noise=noise, tenure=tenure)
+
+    if run_manifest is not None:
+        run_manifest["parameters"].update({"num_flips": flips, "wp": "adaptive" if adaptive else 0.4, "steps": 50,
+                                           "tenure": tenure})
+        run_manifest["timings"] = {"parse": solve_start - parse_start, "solve": time.perf_counter() - solve_start}
+        run_manifest["results"] = {"flips": len(clauses_sat), "max_sat_clauses": clauses_sat.maximum or 0,
+                                   "num_clauses": len(clauses),
+                                   "clauses_sat_digest": manifest.series_digest(clauses_sat.values)}
+        if noise is not None:
+            run_manifest["results"]["noise"] = {"adaptations": noise.adaptations, "final_wp": noise.wp,
+                                                "min_wp": noise.trajectory.minimum,
+                                                "max_wp": noise.trajectory.maximum}
+            run_manifest["results"]["noise_digest"] = manifest.series_digest(noise.trajectory.values)
+
+    steps, time_values, clauses_sat_values = clauses_sat.points()
+    _, random_walk_time, random_walk_result = random_walk.points()
+    _, choose_and_flip_time, choose_and_flip_result = choose_and_flip.points()
 
     print("c Generating graphs for GWSAT")
+    import matplotlib.pyplot as plt
 
     # Plotting RTD graph for Time VS Steps
     plt.title("RTD graph for Time VS Restarts")
@@ -24,7 +58,7 @@ def generate_plots_for_gwsat(filename):
 
     # Potting RTD graph for number of satisfied clauses over time
     plt.title("RTD graph for Time VS Number of satisfied clauses")
-    plt.plot(time_values, clauses_sat)
+    plt.plot(time_values, clauses_sat_values)
     plt.xlabel("Time")
     plt.ylabel("Number of Satisfied Clauses")
     plt.show()
@@ -34,88 +68,159 @@ def generate_plots_for_gwsat(filename):
     plt.plot(random_walk_time, random_walk_result)
     plt.xlabel("Time")
     plt.ylabel("Number of Satisfied Clauses")
-    plt.text(3, 8, "Total Number of Random Walks: "+str(len(random_walk_result)))
+    plt.text(3, 8, "Total Number of Random Walks: "+str(len(random_walk)))
     plt.show()
 
+    if noise is not None:
+        # Plotting the walk probability chosen by the adaptive noise mechanism
+        plt.title("Adaptive noise: walk probability VS flips")
+        noise_flips, _, noise_wp = noise.trajectory.points()
+        plt.step(noise_flips, noise_wp, where="post")
+        plt.xlabel("Flips")
+        plt.ylabel("Walk probability")
+        plt.show()
+
     # Plotting RTD graph for number of satisfied clauses using Choose and Flip over time
     plt.title("RTD graph for Choose and Flip VS Number of satisfied clauses")
     plt.plot(choose_and_flip_time, choose_and_flip_result)
     plt.xlabel("Time")
     plt.ylabel("Number of Satisfied Clauses")
-    plt.text(3, 8, "Total Number of Choose and Flips: "+str(len(choose_and_flip_result)))
+    plt.text(3, 8, "Total Number of Choose and Flips: "+str(len(choose_and_flip)))
     plt.show()
 
     # Plotting RTD graph for Random Walk vs Choose and Flip
     plt.title("RTD graph for Random Walk vs Choose and Flip")
     category = ["Max value Random Walk", " Max value Choose and Flip", "Min value Random Walk",
                 "Min value Choose and Flip"]
-    bars = plt.bar(category, [max(random_walk_result), max(choose_and_flip_result),
-                              min(random_walk_result), min(choose_and_flip_result)])
+    bars = plt.bar(category, [random_walk.maximum or 0, choose_and_flip.maximum or 0,
+                              random_walk.minimum or 0, choose_and_flip.minimum or 0])
     for bar in bars:
         val = bar.get_height()
         plt.text(bar.get_x(), val + .0055, val)
     plt.show()
 
 
-def parsed_cnf_file(filename):
+def parsed_cnf_file(filename, use_cache=False, cache_dir=None, simplify=False):
     """
-    Parses the specified cnf file for gwsat
+    Parses the specified cnf file for gwsat, see dimacs.parse. With `use_cache`
+    the compiled formula is loaded from (or saved to) the formula cache, see
+    formulacache.py. With `simplify` the formula is preprocessed, see
+    preprocess.py; the program ends if preprocessing decides it
 
     Returns:
 
-        - clauses: All the clauses into a set of frozensets
+        - clauses: All the clauses in a clausedb.ClauseDatabase
         - num_vars: Number of variables
+        - restore: maps a configuration back to the original variables, None without `simplify`
 
     """
-    clauses = []
-    num_vars = 0
-    with open(filename) as f:
-        ok_to_read = False
-        is_clause_done = False
-        clause = []
-        for line in f:
-            if line[0] == "%":
-                break
-            if ok_to_read:
-                values = list(map(int, line.strip().split()))
-                if is_clause_done:
-                    clause = []
-                for value in values:
-                    if value == 0:
-                        is_clause_done = True
-                        if clause not in clauses:
-                            clauses.append(clause)
-                    else:
-                        clause.append(value)
-
-                        if value < -num_vars or value > num_vars:
-                            print('Error in variable value ', value, '. Its must be in range [1, ', num_vars, ']')
-                            exit(0)
-            if line[0] == "p":
-                ok_to_read = True
-                first_line = line.split()
-                num_vars = int(first_line[2])
-
-                if first_line[1] != "cnf":
-                    print("Invalid File Type. File type has to be CNF")
-                    exit(0)
+    try:
+        if use_cache:
+            import formulacache
+            clauses, _ = formulacache.load_formula(filename, "cnf", cache_dir)
+        else:
+            import dimacs
+            clauses = dimacs.read_cnf(filename)
+    except ValueError as error:
+        print(error)
+        exit(0)
     print("Successfully read file ", filename)
-    return clauses, num_vars
+    if not simplify:
+        return clauses, clauses.num_vars, None
+
+    import preprocess
+    start = time.perf_counter()
+    simplified = preprocess.preprocess(clauses.num_vars, clauses)
+    print("c Preprocessing: ", clauses.num_vars, " -> ", simplified.database.num_vars, " variables, ",
+          len(clauses), " -> ", len(simplified.database), " clauses, ", len(simplified.fixed),
+          " variables fixed in ", time.perf_counter() - start, " s")
+    if simplified.unsatisfiable:
+        print("s Unsatisfiable (found by preprocessing)")
+        exit(0)
+    if not len(simplified.database):
+        print("s Satifiable (solved by preprocessing)")
+        print("solution config: ", simplified.restore([]))
+        exit(0)
+    return simplified.database, simplified.database.num_vars, simplified.restore
+
+
+def generate_plots_for_paws(filename, backend="python", use_cache=False, cache_dir=None, seed=None,
+                            run_manifest=None, simplify=False):
+    import paws
+    parse_start = time.perf_counter()
+    clauses, num_vars, restore = parsed_cnf_file(filename, use_cache, cache_dir, simplify)
+    solve_start = time.perf_counter()
+
+    # Same flip budget as the 50 restarts of GWSAT
+    flips = len(clauses)//2 * 50
+    clauses_sat = paws.solve(num_vars, clauses, flips, backend=backend, seed=seed, restore=restore)
+
+    if run_manifest is not None:
+        run_manifest["parameters"].update({"max_flips": flips, "p_flat": 0.15, "max_inc": 10})
+        run_manifest["timings"] = {"parse": solve_start - parse_start, "solve": time.perf_counter() - solve_start}
+        run_manifest["results"] = {"flips": len(clauses_sat), "max_sat_clauses": clauses_sat.maximum or 0,
+                                   "num_clauses": len(clauses),
+                                   "clauses_sat_digest": manifest.series_digest(clauses_sat.values)}
+
+    print("c Generating graphs for PAWS")
+    import matplotlib.pyplot as plt
+    _, time_values, clauses_sat_values = clauses_sat.points()
 
+    # Potting RTD graph for number of satisfied clauses over time
+    plt.title("RTD graph for Time VS Number of satisfied clauses")
+    plt.plot(time_values, clauses_sat_values)
+    plt.xlabel("Time")
+    plt.ylabel("Number of Satisfied Clauses")
+    plt.show()
 
-def generate_plots_for_ga(filename):
-
-    generations = [generation+1 for generation in range(50)]
 
-    chromosomes, num_genes, chromosome_fitness, top_fitness = parsed_wcnf_file(filename)
-    fitness_values_single, time_values_single = ga.solve(chromosomes, num_genes, chromosome_fitness, operation="single")
-    chromosomes, num_genes, chromosome_fitness, top_fitness = parsed_wcnf_file(filename)
-    fitness_values_two, time_values_two = ga.solve(chromosomes, num_genes, chromosome_fitness, operation="two")
+def generate_plots_for_ga(filename, backend="python", use_cache=False, cache_dir=None, seed=None,
+                          run_manifest=None, batch=False, islands=None, migration_interval=5, checkpointer=None,
+                          incremental=False):
+    import ga
+    import island
+
+    parse_start = time.perf_counter()
+    chromosomes, num_genes, chromosome_fitness, top_fitness = parsed_wcnf_file(filename, use_cache, cache_dir)
+    solve_start = time.perf_counter()
+    if islands is None:
+        fitness_values_single, time_values_single = ga.solve(chromosomes, num_genes, chromosome_fitness,
+                                                             operation="single", backend=backend, seed=seed,
+                                                             batch=batch, checkpointer=checkpointer,
+                                                             incremental=incremental)
+    else:
+        fitness_values_single, time_values_single = island.solve(chromosomes, num_genes, chromosome_fitness,
+                                                                 operation="single", backend=backend, seed=seed,
+                                                                 batch=batch, islands=islands or None,
+                                                                 migration_interval=migration_interval,
+                                                                 target=top_fitness)
+    chromosomes, num_genes, chromosome_fitness, top_fitness = parsed_wcnf_file(filename, use_cache, cache_dir)
+    if islands is None:
+        fitness_values_two, time_values_two = ga.solve(chromosomes, num_genes, chromosome_fitness,
+                                                       operation="two", backend=backend, seed=seed,
+                                                       batch=batch, checkpointer=checkpointer,
+                                                       incremental=incremental)
+    else:
+        fitness_values_two, time_values_two = island.solve(chromosomes, num_genes, chromosome_fitness,
+                                                           operation="two", backend=backend, seed=seed,
+                                                           batch=batch, islands=islands or None,
+                                                           migration_interval=migration_interval,
+                                                           target=top_fitness)
+
+    if run_manifest is not None:
+        run_manifest["parameters"].update({"generations": 50})
+        run_manifest["timings"] = {"parse": solve_start - parse_start,
+                                   "solve_single": time_values_single[-1], "solve_two": time_values_two[-1]}
+        run_manifest["results"] = {"max_fitness_single": max(fitness_values_single),
+                                   "max_fitness_two": max(fitness_values_two),
+                                   "fitness_single_digest": manifest.series_digest(fitness_values_single),
+                                   "fitness_two_digest": manifest.series_digest(fitness_values_two)}
 
     print("c Generating graphs for GA single point crossover")
-    generate_plots_helper(fitness_values_single, time_values_single, generations)
+    import matplotlib.pyplot as plt
+    generate_plots_helper(fitness_values_single, time_values_single)
     print("c Generating graphs for GS two point crossover")
-    generate_plots_helper(fitness_values_two, time_values_two, generations)
+    generate_plots_helper(fitness_values_two, time_values_two)
     print("c Single Point vs Two Point")
     plt.title("RTD graph for Single Point Crossover vs Two-Point Crossover")
     category = ["Max Fitness value Single Point", " Max Fitness value Two Point"]
@@ -126,7 +231,80 @@ def generate_plots_for_ga(filename):
     plt.show()
 
 
-def generate_plots_helper(fitness_values, time_values, generations):
+def generate_plots_for_wwalksat(filename, backend="python", use_cache=False, cache_dir=None, seed=None,
+                                run_manifest=None):
+    import wwalksat
+    parse_start = time.perf_counter()
+    database, top_fitness = parsed_weighted_file(filename, use_cache, cache_dir)
+    solve_start = time.perf_counter()
+
+    flips = len(database)//2
+    cost_values, best_configuration, best_cost = wwalksat.solve(database.num_vars, database, top_fitness, flips,
+                                                                0.4, backend=backend, seed=seed)
+
+    if run_manifest is not None:
+        run_manifest["parameters"].update({"num_flips": flips, "wp": 0.4, "steps": 50, "top": top_fitness})
+        run_manifest["timings"] = {"parse": solve_start - parse_start, "solve": time.perf_counter() - solve_start}
+        run_manifest["results"] = {"flips": len(cost_values), "best_cost": best_cost,
+                                   "cost_digest": manifest.series_digest(cost_values.values)}
+
+    print("c Generating graphs for weighted WalkSAT")
+    import matplotlib.pyplot as plt
+    _, time_values, costs = cost_values.points()
+
+    # Plotting RTD graph for the best cost over time
+    plt.title("RTD graph for Time VS Best cost")
+    plt.plot(time_values, costs)
+    plt.xlabel("Time")
+    plt.ylabel("Weight of the falsified clauses")
+    plt.show()
+
+
+def run_anytime(algorithm, filename, time_budget=None, step_budget=None, backend="python", use_cache=False,
+                cache_dir=None, seed=None, run_manifest=None, simplify=False, tenure=0):
+    """
+    Runs an anytime solver (see anytime.py) on the file under a time and/or
+    step budget, printing its progress, and prints the best result found
+    """
+    import anytime
+    restore = None
+    if algorithm == "GA":
+        chromosomes, num_genes, chromosome_fitness, top_fitness = parsed_wcnf_file(filename, use_cache, cache_dir)
+        solver = anytime.GASolver(chromosomes, num_genes, chromosome_fitness, "two", backend, seed)
+        label, sample_every = "total fitness", 1
+    elif algorithm == "WWALKSAT":
+        database, top_fitness = parsed_weighted_file(filename, use_cache, cache_dir)
+        solver = anytime.WeightedWalkSATSolver(database.num_vars, database, top_fitness, 0.4,
+                                               backend=backend, seed=seed)
+        label, sample_every = "cost", 1000
+    else:
+        clauses, num_vars, restore = parsed_cnf_file(filename, use_cache, cache_dir, simplify)
+        solver = anytime.GWSATSolver(num_vars, clauses, 0.4, backend=backend, seed=seed, tenure=tenure)
+        label, sample_every = "falsified clauses", 1000
+
+    sample_seconds = 1.0 if time_budget is not None else None
+    event = anytime.last_event(anytime.print_progress(solver.run(time_budget, step_budget, sample_every,
+                                                                 sample_seconds), label))
+    best = solver.best()
+    print("c Best ", label, ": ", event.best)
+    print("c Best assignment: ", best if restore is None else restore(best))
+
+    if run_manifest is not None:
+        run_manifest["parameters"].update({"time_budget": time_budget, "step_budget": step_budget,
+                                           "tenure": tenure})
+        run_manifest["timings"] = {"solve": event.elapsed}
+        # The GA's best is (chromosome, fitness)
+        values = list(best[0]) + [best[1]] if algorithm == "GA" else list(best)
+        run_manifest["results"] = {"steps": event.steps, "best": event.best,
+                                   "best_digest": manifest.series_digest([event.steps, event.best] + values)}
+
+
+def generate_plots_helper(fitness_values, time_values):
+    import matplotlib.pyplot as plt
+
+    # The island model may stop before the last generation
+    generations = [generation+1 for generation in range(len(fitness_values))]
+
     # Plotting RTD graph for time vs generations
     plt.title("RTD graph for Time VS Generations")
     plt.plot(time_values, generations)
@@ -148,9 +326,11 @@ def generate_plots_helper(fitness_values, time_values, generations):
     plt.xlabel("Time")
     plt.show()
 
-def parsed_wcnf_file(filename):
+def parsed_wcnf_file(filename, use_cache=False, cache_dir=None):
     """
-    Parses the specified wcnf file for ga
+    Parses the specified wcnf file for ga, see dimacs.parse. With `use_cache`
+    the compiled formula is loaded from (or saved to) the formula cache, see
+    formulacache.py
 
     Returns:
 
@@ -160,46 +340,29 @@ def parsed_wcnf_file(filename):
         - top_fitness: Highest fitness in the input file
 
     """
-    chromosomes = []
-    num_genes = 0
-    top_fitness = 0
-    chromosome_fitness = []
-
-    with open(filename) as f:
-        ok_to_read = False
-        is_clause_done = False
-        chromosome = []
-        for line in f:
-            if line[0] == "%":
-                break
-            if ok_to_read:
-                values = list(map(int, line.strip().split()))
-                if is_clause_done:
-                    chromosome = []
-                for value in values:
-                    if value == 0:
-                        is_clause_done = True
-                        if chromosome not in chromosomes:
-                            chromosome_fitness.append(int(chromosome[0]))
-                            del chromosome[0]
-                            chromosomes.append(chromosome)
-                    else:
-                        chromosome.append(value)
-
-                        if chromosome.index(value) != 0:
-                            if value < -num_genes or value > num_genes:
-                                print('Error in variable value ', value, '. Its must be in range [1, ', num_genes, ']')
-            if line[0] == "p":
-                ok_to_read = True
-                first_line = line.split()
-                num_genes = int(first_line[2])
-                top_fitness = int(first_line[4])
-
-                if first_line[1] != "wcnf":
-                    print("Invalid File Type. File type has to be CNF")
+    database, top_fitness = parsed_weighted_file(filename, use_cache, cache_dir)
+    chromosomes = [list(chromosome) for chromosome in database]
+    chromosome_fitness = list(database.weights)
+    return chromosomes, database.num_vars, chromosome_fitness,  top_fitness
+
 
+def parsed_weighted_file(filename, use_cache=False, cache_dir=None):
+    """
+    Parses the specified wcnf file, see dimacs.parse, and returns the weighted
+    clause database and the top weight
+    """
+    try:
+        if use_cache:
+            import formulacache
+            database, top_fitness = formulacache.load_formula(filename, "wcnf", cache_dir)
+        else:
+            import dimacs
+            database, top_fitness = dimacs.read_wcnf(filename)
+    except ValueError as error:
+        print(error)
+        exit(0)
     print("Successfully read file ", filename)
-    return chromosomes, num_genes, chromosome_fitness,  top_fitness
+    return database, top_fitness
 
 
 #######################
@@ -211,14 +374,181 @@ if __name__ == '__main__':
     """
     Execute the specified algorithm and prints the result
     """
-    algorithm = sys.argv[1]
-    file = sys.argv[2]
-    if algorithm.upper() == "GWSAT":
+    parser = argparse.ArgumentParser(description="Run GWSAT or GA against a cnf/wcnf file")
+    parser.add_argument("algorithm", nargs="?", help="gwsat, paws, ga, wwalksat or bench")
+    parser.add_argument("files", nargs="*",
+                        help="input .cnf file for gwsat and paws, .wcnf file for ga and wwalksat, files or directories "
+                             "for bench")
+    parser.add_argument("--backend", choices=BACKENDS, default="python",
+                        help="how clauses are evaluated, numpy falls back to python if it is not installed")
+    parser.add_argument("--no-cache", dest="use_cache", action="store_false",
+                        help="always parse the input file instead of using the compiled formula cache")
+    parser.add_argument("--cache-dir", default=None,
+                        help="directory for the compiled formula cache, by default gwsat-ga in the user cache "
+                             "directory (~/.cache)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="run the GWSAT restarts in parallel on this many processes, 0 for one per core")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="seed of the random number generator, a random one is drawn and printed if missing")
+    parser.add_argument("--manifest", default=None,
+                        help="write a JSON manifest with the seed, parameters, instance hash and timings of the run")
+    parser.add_argument("--replay", default=None,
+                        help="re-run the algorithm, file, seed and parameters recorded in a manifest")
+    parser.add_argument("--ga-batch", dest="ga_batch", action="store_true",
+                        help="give every GA individual its own genotype and score each generation in one batch")
+    parser.add_argument("--ga-incremental", dest="ga_incremental", action="store_true",
+                        help="keep the score of every GA individual up to date instead of scoring every child")
+    parser.add_argument("--islands", type=int, default=None,
+                        help="run the GA as an island model on this many processes, 0 for one per core")
+    parser.add_argument("--migration-interval", type=int, default=5,
+                        help="generations between two migrations of the island model")
+    parser.add_argument("--time-budget", type=float, default=None,
+                        help="run an anytime solver for this many seconds and print its progress instead of the graphs")
+    parser.add_argument("--step-budget", type=int, default=None,
+                        help="run an anytime solver for this many flips (generations for ga) and print its progress")
+    parser.add_argument("--profile", action="store_true",
+                        help="time the phases of the algorithm and print a per-phase breakdown with counters")
+    parser.add_argument("--profile-dump", default=None,
+                        help="with --profile, also write cProfile statistics to this file (pstats format)")
+    parser.add_argument("--preprocess", action="store_true",
+                        help="simplify .cnf formulas (unit propagation, pure literals, subsumption) before the search")
+    parser.add_argument("--adaptive-noise", dest="adaptive_noise", action="store_true",
+                        help="adapt the GWSAT random walk probability online instead of using 0.4")
+    parser.add_argument("--tabu", type=int, default=0,
+                        help="tabu tenure of the GWSAT greedy move: variables flipped in the last n flips are avoided")
+    parser.add_argument("--checkpoint", default=None,
+                        help="save the state of a gwsat or ga run to this file, to continue it later with --resume")
+    parser.add_argument("--checkpoint-interval", type=float, default=60.0,
+                        help="seconds between two checkpoints (default 60)")
+    parser.add_argument("--resume", default=None,
+                        help="continue the run saved in a checkpoint file, with its algorithm, file, seed and "
+                             "parameters")
+    bench_options = parser.add_argument_group("bench options")
+    bench_options.add_argument("--runs", type=int, default=10, help="runs (seeds) per instance")
+    bench_options.add_argument("--out", default="bench_results", help="directory for runs.csv and summary.json")
+    bench_options.add_argument("--plots", action="store_true", help="also render the RTD plots to PNG files")
+    args = parser.parse_args()
+
+    profiler = None
+    if args.profile or args.profile_dump:
+        import profiler
+        profiler.enable(args.profile_dump)
+
+    if args.algorithm and args.algorithm.upper() == "BENCH":
+        import bench
+        bench.run(args.files or ["sat", "ga"], runs=args.runs, out_dir=args.out, plots=args.plots,
+                  seed=args.seed or 0, backend=args.backend, use_cache=args.use_cache, cache_dir=args.cache_dir)
+        if profiler is not None:
+            profiler.report()
+        exit(0)
+
+    args.file = args.files[0] if args.files else None
+    original_manifest = None
+    if args.replay:
+        original_manifest = manifest.read_manifest(args.replay)
+        args.algorithm = original_manifest["algorithm"]
+        args.file = original_manifest["instance"]
+        args.seed = original_manifest["seed"]
+        args.backend = original_manifest["parameters"].get("backend", args.backend)
+        args.workers = original_manifest["parameters"].get("workers", args.workers)
+        args.ga_batch = original_manifest["parameters"].get("ga_batch", args.ga_batch)
+        args.ga_incremental = original_manifest["parameters"].get("ga_incremental", args.ga_incremental)
+        args.islands = original_manifest["parameters"].get("islands", args.islands)
+        args.migration_interval = original_manifest["parameters"].get("migration_interval",
+                                                                      args.migration_interval)
+        args.preprocess = original_manifest["parameters"].get("preprocess", args.preprocess)
+        args.adaptive_noise = original_manifest["parameters"].get("wp") == "adaptive"
+        args.tabu = original_manifest["parameters"].get("tenure", args.tabu)
+        if original_manifest["parameters"].get("time_budget") is not None or \
+                original_manifest["parameters"].get("step_budget") is not None:
+            # An anytime run is replayed for the steps it did, the time budget
+            # depends on the speed of the machine
+            args.time_budget = None
+            args.step_budget = original_manifest["results"]["steps"]
+    checkpoint_states = None
+    if args.checkpoint or args.resume:
+        import checkpoint
+    if args.resume:
+        if args.replay:
+            parser.error("--resume and --replay cannot be combined")
+        try:
+            checkpoint_run, checkpoint_states = checkpoint.read_checkpoint(args.resume)
+        except (OSError, ValueError) as error:
+            parser.error(str(error))
+        args.algorithm = checkpoint_run["algorithm"]
+        args.file = checkpoint_run["instance"]
+        args.seed = checkpoint_run["seed"]
+        args.backend = checkpoint_run["parameters"]["backend"]
+        args.ga_batch = checkpoint_run["parameters"]["ga_batch"]
+        args.ga_incremental = checkpoint_run["parameters"].get("ga_incremental", False)
+        args.preprocess = checkpoint_run["parameters"]["preprocess"]
+        args.adaptive_noise = checkpoint_run["parameters"]["adaptive_noise"]
+        args.tabu = checkpoint_run["parameters"]["tenure"]
+        if manifest.instance_hash(args.file) != checkpoint_run["instance_sha256"]:
+            parser.error("{} changed since the checkpoint was written".format(args.file))
+        args.checkpoint = args.checkpoint or args.resume
+    if args.algorithm is None or args.file is None:
+        parser.error("the algorithm and the file are required unless --replay or --resume is given")
+    if args.checkpoint and (args.algorithm.upper() not in ("GWSAT", "GA") or args.workers is not None or
+                            args.islands is not None or args.time_budget is not None or
+                            args.step_budget is not None):
+        parser.error("checkpoints are only written by gwsat and ga runs without --workers, --islands or budgets")
+
+    algorithm = args.algorithm
+    file = args.file
+    seed = manifest.new_seed() if args.seed is None else args.seed
+    print("c Seed: ", seed)
+
+    checkpointer = None
+    if args.checkpoint:
+        checkpointer = checkpoint.Checkpointer(
+            args.checkpoint, args.checkpoint_interval,
+            manifest.new_manifest(algorithm.lower(), file, seed,
+                                  {"backend": args.backend, "ga_batch": args.ga_batch,
+                                   "ga_incremental": args.ga_incremental, "preprocess": args.preprocess,
+                                   "adaptive_noise": args.adaptive_noise, "tenure": args.tabu}),
+            checkpoint_states)
+
+    run_manifest = None
+    if args.manifest or original_manifest:
+        run_manifest = manifest.new_manifest(algorithm.lower(), file, seed,
+                                             {"backend": args.backend, "workers": args.workers,
+                                              "ga_batch": args.ga_batch, "ga_incremental": args.ga_incremental,
+                                              "islands": args.islands,
+                                              "migration_interval": args.migration_interval,
+                                              "preprocess": args.preprocess})
+
+    if (args.time_budget is not None or args.step_budget is not None) and \
+            algorithm.upper() in ("GWSAT", "GA", "WWALKSAT"):
+        print("c Trying to read file ", file)
+        run_anytime(algorithm.upper(), file, args.time_budget, args.step_budget, args.backend, args.use_cache,
+                    args.cache_dir, seed, run_manifest, args.preprocess, args.tabu)
+    elif algorithm.upper() == "GWSAT":
         print("c Trying to read file ", file)
-        generate_plots_for_gwsat(file)
+        generate_plots_for_gwsat(file, args.backend, args.use_cache, args.cache_dir, args.workers, seed,
+                                 run_manifest, args.preprocess, args.adaptive_noise, args.tabu, checkpointer)
     elif algorithm.upper() == "GA":
         print("c Trying to read file ", file)
-        generate_plots_for_ga(file)
+        generate_plots_for_ga(file, args.backend, args.use_cache, args.cache_dir, seed, run_manifest,
+                              args.ga_batch, args.islands, args.migration_interval, checkpointer,
+                              args.ga_incremental)
+    elif algorithm.upper() == "PAWS":
+        print("c Trying to read file ", file)
+        generate_plots_for_paws(file, args.backend, args.use_cache, args.cache_dir, seed, run_manifest,
+                                args.preprocess)
+    elif algorithm.upper() == "WWALKSAT":
+        print("c Trying to read file ", file)
+        generate_plots_for_wwalksat(file, args.backend, args.use_cache, args.cache_dir, seed, run_manifest)
     else:
-        print("Only GWSAT and GA available at the moment. Try Again")
+        print("Only GWSAT, PAWS, GA, WWALKSAT and BENCH available at the moment. Try Again")
+        run_manifest = None
+
+    if profiler is not None:
+        profiler.report()
+
+    if run_manifest is not None:
+        if args.manifest:
+            manifest.write_manifest(args.manifest, run_manifest)
+        if original_manifest is not None:
+            manifest.compare_replay(original_manifest, run_manifest)
 
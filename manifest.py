@@ -0,0 +1,80 @@
+import datetime
+import hashlib
+import json
+import platform
+import random
+
+
+def new_seed():
+    """
+    Draws a fresh seed from the operating system so that unseeded runs can
+    still be reproduced from their manifest
+    """
+    return random.SystemRandom().randrange(2**32)
+
+
+def instance_hash(filename):
+    """
+    instance_hash(filename) -> sha256 hex digest of the input file
+    """
+    digest = hashlib.sha256()
+    with open(filename, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def series_digest(values):
+    """
+    series_digest(values) -> sha1 hex digest of a series of numbers
+
+    Used to check that a replayed run followed the same trajectory
+    """
+    return hashlib.sha1(",".join(str(value) for value in values).encode()).hexdigest()
+
+
+def new_manifest(algorithm, filename, seed, parameters):
+    """
+    new_manifest(algorithm, filename, seed, parameters) -> dict
+
+    Describes a run: algorithm, instance and its hash, seed and parameters.
+    Timings and results are added to the "timings" and "results" entries as
+    the run goes
+    """
+    return {
+        "algorithm": algorithm,
+        "instance": filename,
+        "instance_sha256": instance_hash(filename),
+        "seed": seed,
+        "parameters": parameters,
+        "timings": {},
+        "results": {},
+        "python": platform.python_version(),
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+    }
+
+
+def write_manifest(path, manifest):
+    with open(path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    print("c Run manifest written to ", path)
+
+
+def read_manifest(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare_replay(original, replayed):
+    """
+    Prints whether a replayed run reproduced the results of the original one
+    """
+    if original.get("instance_sha256") != replayed["instance_sha256"]:
+        print("c Replay warning: the instance file changed since the manifest was written")
+    for name, digest in original.get("results", {}).items():
+        if not name.endswith("_digest"):
+            continue
+        if replayed["results"].get(name) == digest:
+            print("c Replay matches the manifest: ", name)
+        else:
+            print("c Replay differs from the manifest: ", name)
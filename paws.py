@@ -0,0 +1,132 @@
+import localsearch
+import clausedb
+import bitassign
+import vectorized
+import random
+import time
+from trajectory import Trajectory
+
+
+def solve(num_vars, clauses, max_flips, p_flat=0.15, max_inc=10, backend="python", seed=None, restore=None):
+    """
+    solve(num_vars, clauses, max_flips, p_flat, max_inc, backend, seed, restore) -> clauses_sat
+
+    PAWS (Pure Additive Weighting Scheme) dynamic local search. Every clause
+    has a weight, 1 at the start, and the search flips the variable of a
+    falsified clause with the best weighted score (make - break, see
+    localsearch.WeightedEvaluator). When no flip improves the weighted cost
+    the search is in a local minimum: with probability `p_flat` it takes a
+    sideways (score 0) flip, otherwise the weight of every falsified clause
+    is increased by one, which changes the landscape instead of walking at
+    random. Every `max_inc` increases the weights are smoothed: every clause
+    with weight above 1 loses one.
+
+    Runs a single trajectory of at most `max_flips` flips (no restarts) and
+    stops when every clause is satisfied. Weight increases are not flips:
+    they neither use the budget nor are recorded. Returns the number of
+    satisfied clauses of every flip as a trajectory.Trajectory, as
+    gwsat.solve. `restore` is the same as in gwsat.solve
+    """
+    print("c Applying PAWS")
+    database = clausedb.as_database(num_vars, clauses)
+    evaluator = localsearch.WeightedEvaluator(database, 0, vectorized.load_backend(backend, database))
+    if database.weights is not None:
+        # The clause weights of PAWS are its own, a .wcnf file starts from 1 too
+        for index in range(len(database)):
+            evaluator.clause_weight[index] = 1
+
+    rng = random.Random(seed)
+    evaluator.reset(localsearch.random_value_assignment(num_vars, rng))
+    evaluator.last_flipped = 0
+    best = bitassign.BestSoFar(evaluator.configuration, evaluator.num_sat_clauses)
+    raised = set()
+    increases = 0
+
+    clauses_sat = Trajectory(time.time())
+    flips = 0
+    while flips < max_flips and evaluator.falsified.size:
+        score, candidates = best_moves(evaluator)
+        if not candidates:
+            # Only empty clauses are falsified
+            break
+        if score > 0 or (score == 0 and rng.random() < p_flat):
+            evaluator.flip(rng.choice(candidates))
+            flips += 1
+            best.flipped(evaluator.last_flipped)
+            evaluator.last_flipped = 0
+            if evaluator.num_sat_clauses > best.num_sat_clauses:
+                best.improved(evaluator.configuration, evaluator.num_sat_clauses)
+            clauses_sat.record(evaluator.num_sat_clauses)
+        else:
+            increases += 1
+            increase_weights(evaluator, raised)
+            if increases % max_inc == 0:
+                smooth_weights(evaluator, raised)
+    clauses_sat.finish()
+
+    if not evaluator.falsified.size:
+        print("s Satifiable")
+        print("solution found at flip number: ", flips)
+        print("solution config: ", evaluator.configuration)
+    else:
+        print("u Unsatisfiable configuration in ", max_flips)
+        print("c Best configuration satisfies ", best.num_sat_clauses, " of ", len(database), " clauses: ",
+              best.best())
+    print("c Weight increases: ", increases)
+    if restore is not None:
+        print("c Configuration over the original variables: ",
+              restore(evaluator.configuration if not evaluator.falsified.size else best.best()))
+
+    return clauses_sat
+
+
+def best_moves(evaluator):
+    """
+    best_moves(evaluator) -> best score, variables with that score
+
+    Scans the variables of the falsified clauses, the only ones whose flip
+    can lower the weighted cost
+    """
+    literals = evaluator.database.literals
+    offsets = evaluator.database.offsets
+    falsified = evaluator.falsified
+    make_count = evaluator.make_count
+    break_count = evaluator.break_count
+    best_score = None
+    candidates = list()
+    seen = set()
+    for position in range(falsified.size):
+        index = falsified.clauses[position]
+        for literal in literals[offsets[index]:offsets[index+1]]:
+            var = abs(literal)
+            if var in seen:
+                continue
+            seen.add(var)
+            score = make_count[var] - break_count[var]
+            if best_score is None or score > best_score:
+                best_score = score
+                candidates = [var]
+            elif score == best_score:
+                candidates.append(var)
+    return best_score, candidates
+
+
+def increase_weights(evaluator, raised):
+    """
+    Adds one to the weight of every falsified clause, `raised` keeps the
+    clauses whose weight is above 1
+    """
+    falsified = evaluator.falsified
+    for index in list(falsified.clauses[:falsified.size]):
+        evaluator.add_weight(index, 1)
+        raised.add(index)
+
+
+def smooth_weights(evaluator, raised):
+    """
+    Takes one from the weight of every clause whose weight is above 1
+    """
+    for index in list(raised):
+        evaluator.add_weight(index, -1)
+        if evaluator.clause_weight[index] == 1:
+            raised.discard(index)
@@ -0,0 +1,372 @@
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+import dimacs
+import ga
+import gwsat
+import localsearch
+import manifest
+import wwalksat
+
+
+# Number of variables of the generated 3-SAT instances, at the phase transition
+CNF_SIZES = (20, 100, 1000, 10000)
+CLAUSE_RATIO = 4.26
+# Number of variables of the generated weighted instances, with WCNF_RATIO clauses per variable
+WCNF_SIZES = (50, 500, 2000)
+WCNF_RATIO = 4
+TOP_WEIGHT = 16
+
+# Budgets of every run: flips of GWSAT (split in restarts of half the number
+# of clauses), flips of weighted WalkSAT and generations of the GA
+GWSAT_FLIPS = 20000
+WWALKSAT_FLIPS = 10000
+GA_GENERATIONS = 50
+WP = 0.4
+
+# Metrics where a higher value is better, a lower one is better for the others
+HIGHER_IS_BETTER = {"flips_per_second", "generations_per_second"}
+# Metrics in seconds
+SECONDS = {"parse_seconds", "median_time_to_solution"}
+
+DEFAULT_THRESHOLD = 0.2
+# Changes of the times in seconds below this are timer noise, never a regression
+NOISE_SECONDS = 0.001
+# A timed call is repeated until the repetitions take this many seconds, see best_time
+MIN_SECONDS = 0.1
+# The throughputs are measured over repetitions taking at least this many
+# seconds, a single run of a small instance is too short for a stable rate
+THROUGHPUT_SECONDS = 0.5
+# Random flips of the check of the incremental scores, recounted every CHECK_INTERVAL flips
+CHECK_FLIPS = 500
+CHECK_INTERVAL = 100
+
+
+def planted_3sat(num_vars, num_clauses, rng):
+    """
+    planted_3sat(num_vars, num_clauses, rng) -> clauses
+
+    Random 3-SAT clauses over distinct variables, keeping only the clauses
+    satisfied by a hidden random assignment, so the formula is always
+    satisfiable and every run can have a time to solution
+    """
+    hidden = [rng.random() < 0.5 for _ in range(num_vars + 1)]
+    clauses = list()
+    while len(clauses) < num_clauses:
+        clause = [var if rng.random() < 0.5 else -var for var in rng.sample(range(1, num_vars + 1), 3)]
+        if any(hidden[abs(literal)] == (literal > 0) for literal in clause):
+            clauses.append(clause)
+    return clauses
+
+
+def weighted_clauses(num_vars, num_clauses, rng):
+    """
+    weighted_clauses(num_vars, num_clauses, rng) -> (weight, clause) pairs
+
+    Clauses of 1 to 3 literals with weights below TOP_WEIGHT, a tenth of
+    them hard (weight TOP_WEIGHT), as the files in ga/
+    """
+    clauses = list()
+    for _ in range(num_clauses):
+        clause = [var if rng.random() < 0.5 else -var
+                  for var in rng.sample(range(1, num_vars + 1), rng.choice((1, 2, 3, 3)))]
+        weight = TOP_WEIGHT if rng.random() < 0.1 else rng.randint(1, TOP_WEIGHT - 1)
+        clauses.append((weight, clause))
+    return clauses
+
+
+def generate_instances(directory, cnf_sizes=CNF_SIZES, wcnf_sizes=WCNF_SIZES):
+    """
+    generate_instances(directory, cnf_sizes, wcnf_sizes) -> list of (name, filename, file type)
+
+    Writes the instances of the suite to `directory`, seeded by their size so
+    every machine benchmarks the same files. Existing files are kept
+    """
+    os.makedirs(directory, exist_ok=True)
+    instances = list()
+    for num_vars in cnf_sizes:
+        name = "cnf-{}".format(num_vars)
+        filename = os.path.join(directory, "planted3sat-{}.cnf".format(num_vars))
+        if not os.path.exists(filename):
+            num_clauses = round(num_vars * CLAUSE_RATIO)
+            clauses = planted_3sat(num_vars, num_clauses, random.Random(num_vars))
+            with open(filename, "w") as f:
+                f.write("c planted random 3-SAT at ratio {}\n".format(CLAUSE_RATIO))
+                f.write("p cnf {} {}\n".format(num_vars, num_clauses))
+                for clause in clauses:
+                    f.write(" ".join(map(str, clause)) + " 0\n")
+        instances.append((name, filename, "cnf"))
+    for num_vars in wcnf_sizes:
+        name = "wcnf-{}".format(num_vars)
+        filename = os.path.join(directory, "random-{}.wcnf".format(num_vars))
+        if not os.path.exists(filename):
+            num_clauses = num_vars * WCNF_RATIO
+            clauses = weighted_clauses(num_vars, num_clauses, random.Random(num_vars))
+            with open(filename, "w") as f:
+                f.write("c random weighted clauses\n")
+                f.write("p wcnf {} {} {}\n".format(num_vars, num_clauses, TOP_WEIGHT))
+                for weight, clause in clauses:
+                    f.write("{} {} 0\n".format(weight, " ".join(map(str, clause))))
+        instances.append((name, filename, "wcnf"))
+    return instances
+
+
+def quiet(function, *args, **kwargs):
+    """
+    quiet(function, *args, **kwargs) -> result, seconds of the call with its output discarded
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        result = function(*args, **kwargs)
+        return result, time.perf_counter() - start
+
+
+def repeat(min_seconds, function, *args, **kwargs):
+    """
+    repeat(min_seconds, function, *args, **kwargs) -> result, list of the seconds of every call
+
+    Repeats the call until the repetitions take `min_seconds`. The solvers
+    are seeded, every repetition does the same work
+    """
+    result, elapsed = quiet(function, *args, **kwargs)
+    times = [elapsed]
+    while sum(times) < min_seconds:
+        times.append(quiet(function, *args, **kwargs)[1])
+    return result, times
+
+
+def best_time(function, *args, **kwargs):
+    """
+    best_time(function, *args, **kwargs) -> result, seconds of the fastest call
+
+    Repeats the call for MIN_SECONDS, so the short runs of the small
+    instances are not timed once
+    """
+    result, times = repeat(MIN_SECONDS, function, *args, **kwargs)
+    return result, min(times)
+
+
+def throughput(work, function, *args, **kwargs):
+    """
+    throughput(work, function, *args, **kwargs) -> result, work per second, seconds of the fastest call
+
+    `work` is a function of the result giving the work done by one call
+    (flips, generations). The rate is the total work over the total time of
+    the repetitions, which take at least THROUGHPUT_SECONDS
+    """
+    result, times = repeat(THROUGHPUT_SECONDS, function, *args, **kwargs)
+    return result, work(result) * len(times) / sum(times), min(times)
+
+
+def peak_kib(function, *args, **kwargs):
+    """
+    peak_kib(function, *args, **kwargs) -> peak memory traced by tracemalloc during the call, in KiB
+
+    Separate from the timed runs, tracing slows every allocation down
+    """
+    tracemalloc.start()
+    try:
+        quiet(function, *args, **kwargs)
+        return tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def measure_parse(filename, file_type):
+    return {"parse_seconds": best_time(dimacs.parse, filename, file_type)[1],
+            "parse_peak_kib": peak_kib(dimacs.parse, filename, file_type)}
+
+
+def measure_gwsat(database, seeds):
+    """
+    Flips per second of the fastest seed, median time and flips to solution
+    of the runs that solved the formula (if at least half of them did) and
+    peak memory of the first run. The throughputs of the suite are those of
+    the fastest seed, the one least disturbed by the rest of the machine
+    """
+    num_flips = max(1, len(database) // 2)
+    steps = max(1, GWSAT_FLIPS // num_flips)
+    rates = list()
+    solved = list()
+    for seed in seeds:
+        (clauses_sat, *_), rate, elapsed = throughput(lambda result: len(result[0]), gwsat.solve,
+                                                      database.num_vars, database, num_flips, WP, steps, seed=seed)
+        rates.append(rate)
+        if clauses_sat.maximum == len(database):
+            solved.append((elapsed, len(clauses_sat)))
+    metrics = {"flips_per_second": max(rates),
+               "peak_kib": peak_kib(gwsat.solve, database.num_vars, database, num_flips, WP, steps, seed=seeds[0])}
+    if 2 * len(solved) >= len(seeds):
+        metrics["median_time_to_solution"] = statistics.median(elapsed for elapsed, _ in solved)
+        metrics["median_flips_to_solution"] = statistics.median(run_flips for _, run_flips in solved)
+    return metrics
+
+
+def measure_wwalksat(database, top_weight, seeds):
+    num_flips = max(1, len(database) // 2)
+    steps = max(1, WWALKSAT_FLIPS // num_flips)
+    rates = list()
+    for seed in seeds:
+        _, rate, _ = throughput(lambda result: len(result[0]), wwalksat.solve, database.num_vars, database,
+                                top_weight, num_flips, WP, steps, seed=seed)
+        rates.append(rate)
+    return {"flips_per_second": max(rates),
+            "peak_kib": peak_kib(wwalksat.solve, database.num_vars, database, top_weight, num_flips, WP, steps,
+                                 seed=seeds[0])}
+
+
+def measure_ga(database, seeds, operation="two"):
+    def run(seed):
+        return ga.solve([list(chromosome) for chromosome in database], database.num_vars, list(database.weights),
+                        operation, GA_GENERATIONS, seed=seed, verbose=False)
+
+    rate = max(throughput(lambda _: GA_GENERATIONS, run, seed)[1] for seed in seeds)
+    return {"generations_per_second": rate, "peak_kib": peak_kib(run, seeds[0])}
+
+
+def check_scores(database, top_weight=None, seed=0):
+    """
+    check_scores(database, top_weight, seed) -> list of the score errors found
+
+    Flips random variables from a random configuration with the evaluator
+    of the solvers (weighted with `top_weight`) and compares its clause
+    counts and break/make scores with a recount from scratch every
+    CHECK_INTERVAL flips, see localsearch.score_errors
+    """
+    rng = random.Random(seed)
+    if top_weight is None:
+        evaluator = localsearch.IncrementalEvaluator(database)
+    else:
+        evaluator = localsearch.WeightedEvaluator(database, top_weight)
+    evaluator.reset(localsearch.random_value_assignment(database.num_vars, rng))
+    errors = localsearch.score_errors(evaluator)
+    for flip in range(1, CHECK_FLIPS + 1):
+        evaluator.flip(rng.randint(1, database.num_vars))
+        if flip % CHECK_INTERVAL == 0 and not errors:
+            errors = localsearch.score_errors(evaluator)
+    return errors
+
+
+def run_suite(instances, seeds):
+    """
+    run_suite(instances, seeds) -> results
+
+    Runs every benchmark on every instance with the same seeds. The metrics
+    are keyed by "<instance> <benchmark> <metric>". The incremental scores
+    are checked first, the errors found are kept by instance in "errors"
+    """
+    results = {"created": datetime.datetime.now().isoformat(timespec="seconds"),
+               "python": platform.python_version(), "machine": platform.machine(), "seeds": list(seeds),
+               "instances": dict(), "metrics": dict(), "errors": dict()}
+    for name, filename, file_type in instances:
+        print("c Benchmarking ", name)
+        results["instances"][name] = manifest.instance_hash(filename)
+        benchmarks = {"parse": measure_parse(filename, file_type)}
+        database, top_weight = dimacs.parse(filename, file_type)
+        errors = check_scores(database, top_weight if file_type == "wcnf" else None)
+        if errors:
+            results["errors"][name] = errors
+        if file_type == "cnf":
+            benchmarks["gwsat"] = measure_gwsat(database, seeds)
+        else:
+            benchmarks["wwalksat"] = measure_wwalksat(database, top_weight, seeds)
+            benchmarks["ga"] = measure_ga(database, seeds)
+        for benchmark, metrics in benchmarks.items():
+            for metric, value in metrics.items():
+                results["metrics"]["{} {} {}".format(name, benchmark, metric)] = value
+    return results
+
+
+def compare(baseline, results, threshold=DEFAULT_THRESHOLD):
+    """
+    compare(baseline, results, threshold) -> list of the regressed metric keys
+
+    Prints every metric of the baseline and of the results. A metric
+    regressed when it is worse than the baseline by more than `threshold`
+    (0.2 is 20%), and by more than NOISE_SECONDS for the times, or when the
+    baseline has it and the results of the same instance do not (a time to
+    solution of a formula that is no longer solved). Instances whose file
+    changed since the baseline are not compared, those missing from the
+    results (not run, see --sizes) are listed only
+    """
+    regressions = list()
+    for key in sorted(set(baseline["metrics"]) | set(results["metrics"])):
+        instance, _, metric = key.split(" ")
+        if instance not in results["instances"]:
+            print("c {}: {:.6g} (not run)".format(key, baseline["metrics"][key]))
+            continue
+        value = results["metrics"].get(key)
+        if baseline["instances"].get(instance) != results["instances"][instance]:
+            if value is not None:
+                print("c {}: {:.6g} (no baseline for this instance)".format(key, value))
+            continue
+        previous = baseline["metrics"].get(key)
+        if value is None:
+            print("c {}: {:.6g} -> missing REGRESSION".format(key, previous))
+            regressions.append(key)
+            continue
+        if not previous:
+            print("c {}: {:.6g} (no baseline)".format(key, value))
+            continue
+        change = (value - previous) / previous
+        worse = -change if metric in HIGHER_IS_BETTER else change
+        status = ""
+        if worse > threshold and not (metric in SECONDS and abs(value - previous) < NOISE_SECONDS):
+            status = " REGRESSION"
+            regressions.append(key)
+        print("c {}: {:.6g} -> {:.6g} ({:+.1%}){}".format(key, previous, value, change, status))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark regression suite of GWSAT, weighted WalkSAT and GA")
+    parser.add_argument("--baseline", default="perfbench_baseline.json",
+                        help="JSON baseline to compare against, written by the first run or with --save")
+    parser.add_argument("--save", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="relative slowdown flagged as a regression (default 0.2 for 20%%)")
+    parser.add_argument("--runs", type=int, default=3, help="runs (seeds 0..runs-1) per benchmark")
+    parser.add_argument("--sizes", type=int, nargs="*", default=list(CNF_SIZES),
+                        help="number of variables of the generated 3-SAT instances")
+    parser.add_argument("--weighted-sizes", dest="weighted_sizes", type=int, nargs="*", default=list(WCNF_SIZES),
+                        help="number of variables of the generated weighted instances")
+    parser.add_argument("--dir", default="perfbench_instances", help="directory of the generated instances")
+    parser.add_argument("--out", default=None, help="also write the results to this JSON file")
+    args = parser.parse_args()
+
+    instances = generate_instances(args.dir, args.sizes, args.weighted_sizes)
+    results = run_suite(instances, range(args.runs))
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+    if results["errors"]:
+        for name, errors in results["errors"].items():
+            print("c {}: the incremental scores differ from a recount: {}".format(name, "; ".join(errors[:5])))
+        return 1
+    if args.save or not os.path.exists(args.baseline):
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print("c Baseline written to ", args.baseline)
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(baseline, results, args.threshold)
+    if regressions:
+        print("c {} regressions beyond {:.0%} against {}".format(len(regressions), args.threshold, args.baseline))
+        return 1
+    print("c No regressions beyond {:.0%} against {}".format(args.threshold, args.baseline))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
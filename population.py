@@ -0,0 +1,203 @@
+import heapq
+
+
+class FenwickTree:
+    """
+    FenwickTree(values)
+
+    Prefix sums over a list of non negative numbers with O(log n) updates and
+    O(log n) search of the first position whose prefix sum reaches a value,
+    which is what roulette-wheel selection needs
+    """
+
+    def __init__(self, values):
+        self.size = len(values)
+        self.tree = [0] + list(values)
+        for position in range(1, self.size + 1):
+            parent = position + (position & -position)
+            if parent <= self.size:
+                self.tree[parent] += self.tree[position]
+
+    def add(self, index, delta):
+        position = index + 1
+        while position <= self.size:
+            self.tree[position] += delta
+            position += position & -position
+
+    def prefix(self, index):
+        """
+        Returns values[0] + ... + values[index]
+        """
+        total = 0
+        position = index + 1
+        while position > 0:
+            total += self.tree[position]
+            position -= position & -position
+        return total
+
+    def search(self, value):
+        """
+        search(value) -> smallest index whose prefix sum is >= value, or size if
+        the sum of every value is smaller
+        """
+        position = 0
+        remaining = value
+        step = 1 << self.size.bit_length()
+        while step:
+            following = position + step
+            if following <= self.size and self.tree[following] < remaining:
+                position = following
+                remaining -= self.tree[position]
+            step >>= 1
+        return position
+
+
+class Population:
+    """
+    Population(chromosomes, chromosome_fitness)
+
+    Index over the GA population. The two lists are kept (and updated in
+    place) and next to them:
+
+        - total_fitness: running sum of every fitness
+        - a lazy min-heap of (fitness, index) to find the worst individual
+        - a FenwickTree over the fitness values for roulette-wheel selection
+
+    so replacing an individual, finding the worst one and selecting a parent
+    are all O(log n)
+    """
+
+    def __init__(self, chromosomes, chromosome_fitness):
+        self.chromosomes = chromosomes
+        self.chromosome_fitness = chromosome_fitness
+        self.total_fitness = sum(int(fitness) for fitness in chromosome_fitness)
+        self.wheel = FenwickTree(chromosome_fitness)
+        self.rebuild_heap()
+
+    def __len__(self):
+        return len(self.chromosomes)
+
+    def rebuild_heap(self):
+        self.heap = [(fitness, index) for index, fitness in enumerate(self.chromosome_fitness)]
+        heapq.heapify(self.heap)
+
+    def worst(self):
+        """
+        worst() -> fitness, index of the individual with the lowest fitness
+        (the first one on ties)
+        """
+        heap = self.heap
+        while heap[0][0] != self.chromosome_fitness[heap[0][1]]:
+            heapq.heappop(heap)
+        return heap[0]
+
+    def replace(self, index, chromosome, fitness):
+        """
+        Puts `chromosome` with `fitness` in place of the individual at `index`
+        """
+        delta = fitness - self.chromosome_fitness[index]
+        self.chromosomes[index] = chromosome
+        self.chromosome_fitness[index] = fitness
+        self.total_fitness += delta
+        self.wheel.add(index, delta)
+        heapq.heappush(self.heap, (fitness, index))
+        # Drop the stale entries once they outnumber the live ones
+        if len(self.heap) > 2 * len(self.chromosomes):
+            self.rebuild_heap()
+
+    def select(self, value):
+        """
+        select(value) -> index of the first individual whose fitness added to
+        the fitness of the previous ones is >= value, or len(population) if
+        value is above the total fitness
+        """
+        return self.wheel.search(value)
+
+
+def raw_score(genes, configuration):
+    """
+    raw_score(genes, configuration) -> score of the genes before the bounds of ga.calculate_fitness
+
+    A gene whose literal is true under `configuration` adds its absolute
+    value, a false one subtracts half of it
+    """
+    score = 0
+    for gene in genes:
+        value = configuration[abs(gene)-1]
+        if (value and gene > 0) or (not value and gene < 0):
+            score += abs(gene)
+        else:
+            score -= int(abs(gene)/2)
+    return score
+
+
+class ScoreIndex:
+    """
+    ScoreIndex(chromosomes, configuration)
+
+    Raw score (see raw_score) of every individual of the GA population under
+    the configuration shared by the population, kept up to date while
+    mutation flips its variables. occurrences[var] maps the individuals
+    whose genes contain var to their net count of var genes (positive ones
+    minus negative ones): flipping var moves each of their scores by
+    net * (var + var // 2), so flip() only visits them. The population list
+    itself is not kept, replace() must be called with every replacement
+    """
+
+    def __init__(self, chromosomes, configuration):
+        self.configuration = configuration
+        self.scores = list()
+        self.occurrences = [dict() for _ in range(len(configuration) + 1)]
+        for index, chromosome in enumerate(chromosomes):
+            self.scores.append(raw_score(chromosome, configuration))
+            self.add_occurrences(index, chromosome, 1)
+
+    def add_occurrences(self, index, chromosome, sign):
+        occurrences = self.occurrences
+        for gene in chromosome:
+            var = abs(gene)
+            net = occurrences[var].get(index, 0) + (sign if gene > 0 else -sign)
+            if net:
+                occurrences[var][index] = net
+            else:
+                occurrences[var].pop(index, None)
+
+    def replace(self, index, old_chromosome, chromosome, score):
+        """
+        The individual at `index`, `old_chromosome`, was replaced by `chromosome` whose raw score is `score`
+        """
+        self.add_occurrences(index, old_chromosome, -1)
+        self.add_occurrences(index, chromosome, 1)
+        self.scores[index] = score
+
+    def flip(self, var):
+        """
+        flip(var) -> score change of a gene var
+
+        Flips variable var (from 1) of the configuration and updates the
+        scores of the individuals that contain it. The change of the score
+        of any other chromosome is the returned value times its net count
+        of var genes
+        """
+        value = not self.configuration[var-1]
+        self.configuration[var-1] = value
+        step = var + var // 2 if value else -(var + var // 2)
+        scores = self.scores
+        for index, net in self.occurrences[var].items():
+            scores[index] += net * step
+        return step
+
+    def segment(self, chromosome, score, start, end):
+        """
+        segment(chromosome, score, start, end) -> raw score of chromosome[start:end]
+
+        `score` is the raw score of the whole chromosome, so the shorter of
+        the segment and the rest of the chromosome is scored
+        """
+        end = min(end, len(chromosome))
+        if start >= end:
+            return 0
+        if end - start <= len(chromosome) - (end - start):
+            return raw_score(chromosome[start:end], self.configuration)
+        return score - raw_score(chromosome[:start], self.configuration) - \
+            raw_score(chromosome[end:], self.configuration)
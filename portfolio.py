@@ -0,0 +1,138 @@
+import multiprocessing
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+import clausedb
+import gwsat
+import localsearch
+import trajectory
+import vectorized
+
+
+# State of a worker process, set once by init_worker
+worker_evaluator = None
+worker_stop = None
+
+
+def share_database(database):
+    """
+    share_database(database) -> literals, offsets
+
+    Copies the clause database into shared memory (multiprocessing.RawArray)
+    so the worker processes map it instead of receiving a pickled copy with
+    every task
+    """
+    literals = multiprocessing.RawArray('i', len(database.literals))
+    memoryview(literals).cast('B')[:] = bytes(database.literals)
+    offsets = multiprocessing.RawArray('q', len(database.offsets))
+    memoryview(offsets).cast('B')[:] = bytes(database.offsets)
+    return literals, offsets
+
+
+def init_worker(num_vars, literals, offsets, backend, stop):
+    """
+    Builds the evaluator of a worker process once, on top of the shared arrays
+    """
+    global worker_evaluator, worker_stop
+    database = clausedb.ClauseDatabase.from_buffers(num_vars,
+                                                    memoryview(literals).cast('B').cast('i'),
+                                                    memoryview(offsets).cast('B').cast('q'))
+    worker_evaluator = localsearch.IncrementalEvaluator(database, vectorized.load_backend(backend, database))
+    worker_stop = stop
+
+
+def run_restart(seed, num_flips, wp, start, record_moves, adaptive=False, tenure=0):
+    """
+    Runs one GWSAT restart in a worker process with its own seed, see
+    gwsat.restart. With `adaptive` the restart adapts its own noise and the
+    gwsat.AdaptiveNoise is added to the result
+    """
+    rng = random.Random(seed)
+    current_configuration = localsearch.random_value_assignment(worker_evaluator.num_vars, rng)
+    worker_evaluator.reset(current_configuration)
+    noise = gwsat.AdaptiveNoise(len(worker_evaluator.database)) if adaptive else None
+    # The workers run concurrently, the parent prints the solution
+    result = gwsat.restart(worker_evaluator, num_flips, wp, start, record_moves, worker_stop, rng, noise, tenure,
+                           verbose=False)
+    if noise is not None:
+        noise.trajectory.finish()
+    return result + (noise,)
+
+
+def solve(num_vars, clauses, num_flips, wp, steps=50, backend="python", workers=None, seed=None, restore=None,
+          noise=None, tenure=0):
+    """
+    solve(num_vars, clauses, num_flips, wp, steps, backend, workers, seed, restore, noise, tenure)
+        -> same trajectories as gwsat.solve
+
+    Portfolio version of gwsat.solve: the `steps` restarts run in a process
+    pool with one worker per core (or `workers`), every restart with its own
+    seed derived from `seed`. The formula is shared with the workers through
+    shared memory. As soon as a restart satisfies every clause the other
+    workers are told to stop and the pending restarts are cancelled.
+
+    The satisfied clauses trajectory is the best-so-far over all restarts
+    (see trajectory.best_so_far); the random walk and choose and flip
+    trajectories come from the first restart.
+    With a gwsat.AdaptiveNoise as `noise` every restart adapts its own walk
+    probability and the trajectory of the first restart is stored in `noise`
+    """
+    print("c Applying GWSAT portfolio")
+    database = clausedb.as_database(num_vars, clauses)
+    workers = workers or os.cpu_count() or 1
+    base_seed = random.randrange(2**32) if seed is None else seed
+
+    literals, offsets = share_database(database)
+    stop = multiprocessing.Event()
+    restarts = dict()
+    solution_found = False
+
+    start = time.time()
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                             initargs=(num_vars, literals, offsets, backend, stop)) as executor:
+        pending = {executor.submit(run_restart, base_seed + step, num_flips, wp, start, step == 0,
+                                   noise is not None, tenure): step
+                   for step in range(steps)}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                step = pending.pop(future)
+                if future.cancelled():
+                    continue
+                restarts[step] = future.result()
+                if restarts[step][0] and not solution_found:
+                    solution_found = True
+                    print("c Solution found by restart ", step, " with seed ", base_seed + step)
+                    stop.set()
+                    for other in pending:
+                        other.cancel()
+
+    # No restart reports when steps is 0, as in gwsat.solve
+    best_configuration = None
+    best_sat_clauses = -1
+    if restarts:
+        best = max(restarts.values(), key=lambda result: result[5])
+        best_configuration, best_sat_clauses = best[4], best[5]
+    if solution_found:
+        print("s Satifiable")
+        print("solution found at flip number: ", len(best[1]) - 1)
+        print("solution config: ", best_configuration)
+    else:
+        print("u Unsatisfiable configuration in ", num_flips)
+        print("c Best configuration satisfies ", best_sat_clauses, " of ", len(database), " clauses: ",
+              best_configuration)
+    if restore is not None and best_configuration is not None:
+        print("c Configuration over the original variables: ", restore(best_configuration))
+
+    clauses_sat = trajectory.best_so_far([result[1] for result in restarts.values()], start)
+    if not restarts:
+        return clauses_sat, trajectory.Trajectory(start), trajectory.Trajectory(start)
+    first = restarts[min(restarts)]
+    if noise is not None:
+        noise.trajectory = first[6].trajectory
+        noise.wp = first[6].wp
+        noise.adaptations = first[6].adaptations
+        print("c Final walk probability of the first restart ", noise.wp, " after ", noise.adaptations,
+              " adaptations")
+    return clauses_sat, first[2], first[3]
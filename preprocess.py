@@ -0,0 +1,195 @@
+import clausedb
+
+
+class Preprocessed:
+    """
+    Preprocessed(database, num_vars, fixed, new_to_old, unsatisfiable)
+
+    Result of preprocess():
+
+        - database: the simplified formula over the variables 1..len(new_to_old)
+        - num_vars: number of variables of the original formula
+        - fixed: dict original var -> value forced by unit propagation or pure literals
+        - new_to_old: new_to_old[var-1] is the original variable of variable var
+        - unsatisfiable: True if propagation derived the empty clause
+    """
+
+    def __init__(self, database, num_vars, fixed, new_to_old, unsatisfiable):
+        self.database = database
+        self.num_vars = num_vars
+        self.fixed = fixed
+        self.new_to_old = new_to_old
+        self.unsatisfiable = unsatisfiable
+
+    def restore(self, configuration):
+        """
+        restore(configuration) -> list of booleans over the original variables
+
+        Maps a configuration of the simplified formula back to the original
+        one. Variables that disappeared without being fixed occur in no
+        remaining clause and are set to False
+        """
+        values = [False] * self.num_vars
+        for var, value in self.fixed.items():
+            values[var-1] = value
+        for index, var in enumerate(self.new_to_old):
+            values[var-1] = bool(configuration[index])
+        return values
+
+
+class Simplifier:
+    """
+    Simplifier(num_vars, clauses)
+
+    Working copy of a formula for preprocess(): every live clause is a set of
+    literals and `occurrences[literal]` holds the ids of the live clauses
+    that contain it, so a clause can be removed or strengthened by visiting
+    only the clauses of its literals
+    """
+
+    def __init__(self, num_vars, clauses):
+        self.num_vars = num_vars
+        self.clauses = list()
+        self.occurrences = dict()
+        self.fixed = dict()
+        self.units = list()
+        self.unsatisfiable = False
+        for clause in clauses:
+            literals = set(clause)
+            # A clause with x and -x is always satisfied
+            if any(-literal in literals for literal in literals):
+                continue
+            self.add(literals)
+
+    def add(self, literals):
+        index = len(self.clauses)
+        self.clauses.append(literals)
+        for literal in literals:
+            self.occurrences.setdefault(literal, set()).add(index)
+        if len(literals) == 1:
+            self.units.append(index)
+        elif not literals:
+            self.unsatisfiable = True
+
+    def remove(self, index):
+        for literal in self.clauses[index]:
+            self.occurrences[literal].discard(index)
+        self.clauses[index] = None
+
+    def remove_literal(self, index, literal):
+        """
+        Strengthens clause `index` by removing `literal`
+        """
+        clause = self.clauses[index]
+        clause.discard(literal)
+        self.occurrences[literal].discard(index)
+        if len(clause) == 1:
+            self.units.append(index)
+        elif not clause:
+            self.unsatisfiable = True
+
+    def assign(self, literal):
+        """
+        Makes `literal` true: its clauses are satisfied and -literal is
+        removed from the others
+        """
+        self.fixed[abs(literal)] = literal > 0
+        for index in list(self.occurrences.get(literal, ())):
+            self.remove(index)
+        for index in list(self.occurrences.get(-literal, ())):
+            self.remove_literal(index, -literal)
+
+    def propagate(self):
+        """
+        Unit propagation. Returns False if a conflict was found
+        """
+        while self.units and not self.unsatisfiable:
+            index = self.units.pop()
+            clause = self.clauses[index]
+            if clause is None or len(clause) != 1:
+                continue
+            literal = next(iter(clause))
+            if abs(literal) in self.fixed:
+                # The other polarity was fixed and removed from the clause
+                self.unsatisfiable = self.fixed[abs(literal)] != (literal > 0)
+                continue
+            self.assign(literal)
+        return not self.unsatisfiable
+
+    def pure_literals(self):
+        """
+        Makes true every literal whose negation occurs in no live clause.
+        Returns the number of literals fixed
+        """
+        fixed = 0
+        for literal, indexes in list(self.occurrences.items()):
+            if indexes and not self.occurrences.get(-literal) and abs(literal) not in self.fixed:
+                self.assign(literal)
+                fixed += 1
+        return fixed
+
+    def subsume(self):
+        """
+        Backward subsumption and self-subsumption: every clause C removes the
+        clauses D it is a subset of, and strengthens the clauses D with a
+        literal -l such that C minus l is a subset of D, by removing -l from
+        D. Only the occurrence lists of the literals of C are visited.
+        Returns the number of clauses removed or strengthened
+        """
+        changes = 0
+        order = sorted((index for index, clause in enumerate(self.clauses) if clause), key=lambda index:
+                       len(self.clauses[index]))
+        for index in order:
+            clause = self.clauses[index]
+            if not clause or self.unsatisfiable:
+                continue
+            # Subsumption: D contains every literal of C
+            pivot = min(clause, key=lambda literal: len(self.occurrences[literal]))
+            for other in list(self.occurrences[pivot]):
+                candidate = self.clauses[other]
+                if other != index and len(candidate) >= len(clause) and clause <= candidate:
+                    self.remove(other)
+                    changes += 1
+            # Self-subsumption: D contains -l and the rest of C
+            for literal in list(clause):
+                for other in list(self.occurrences.get(-literal, ())):
+                    candidate = self.clauses[other]
+                    if other != index and len(candidate) >= len(clause) and \
+                            all(item in candidate for item in clause if item != literal):
+                        self.remove_literal(other, -literal)
+                        changes += 1
+                if self.clauses[index] is None:
+                    break
+        return changes
+
+
+def preprocess(num_vars, clauses, max_rounds=10):
+    """
+    preprocess(num_vars, clauses, max_rounds) -> Preprocessed
+
+    Simplifies a CNF formula before the search, keeping it equisatisfiable:
+    duplicate literals and tautologies are dropped, then unit propagation,
+    pure literal elimination and subsumption / self-subsumption run until
+    nothing changes (at most `max_rounds` rounds). The remaining variables
+    are numbered again from 1, see Preprocessed.restore to map a solution
+    back. Only meant for .cnf formulas: it is not sound for the soft clauses
+    of weighted MaxSAT
+    """
+    simplifier = Simplifier(num_vars, clausedb.as_database(num_vars, clauses))
+    for _ in range(max_rounds):
+        if not simplifier.propagate():
+            break
+        changes = simplifier.pure_literals()
+        if not simplifier.propagate():
+            break
+        changes += simplifier.subsume()
+        if not simplifier.propagate() or not changes:
+            break
+
+    live = [sorted(clause, key=abs) for clause in simplifier.clauses if clause is not None]
+    new_to_old = sorted({abs(literal) for clause in live for literal in clause})
+    old_to_new = {var: index + 1 for index, var in enumerate(new_to_old)}
+    database = clausedb.ClauseDatabase.from_clauses(
+        len(new_to_old), [[old_to_new[abs(literal)] if literal > 0 else -old_to_new[abs(literal)]
+                           for literal in clause] for clause in live])
+    return Preprocessed(database, num_vars, simplifier.fixed, new_to_old, simplifier.unsatisfiable)
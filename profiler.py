@@ -0,0 +1,180 @@
+import cProfile
+import functools
+import pstats
+import sys
+import time
+
+
+# Profiling is off unless enable() is called: the functions of the solvers
+# are only replaced by timed wrappers then, so a normal run executes none of
+# the code of this module
+enabled = False
+
+# name -> [calls, inclusive ns, self ns, net allocated blocks]
+phases = dict()
+counters = dict()
+# Time spent in the children of every open phase
+stack = list()
+root_time = [0]
+# Blocks counted by the wrapper itself on every call, see calibrate()
+wrapper_blocks = [0]
+profile = None
+profile_path = None
+
+
+def count(name, amount=1):
+    counters[name] = counters.get(name, 0) + amount
+
+
+def timed(name, function, visits=None):
+    """
+    timed(name, function, visits) -> wrapper of function
+
+    The wrapper adds the calls, the time (inclusive and without the nested
+    phases) and the net memory blocks allocated by `function` to phase
+    `name`. `visits(args)` may return the number of clauses a call visits,
+    added to the "clause visits" counter
+    """
+    clock = time.perf_counter_ns
+    blocks = sys.getallocatedblocks
+    phase = phases.setdefault(name, [0, 0, 0, 0])
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        if visits is not None:
+            count("clause visits", visits(args))
+        stack.append(0)
+        start_blocks = blocks()
+        start = clock()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            elapsed = clock() - start
+            children = stack.pop()
+            if stack:
+                stack[-1] += elapsed
+            else:
+                root_time[0] += elapsed
+            phase[0] += 1
+            phase[1] += elapsed
+            phase[2] += elapsed - children
+            phase[3] += blocks() - start_blocks
+
+    wrapper.profiled = function
+    return wrapper
+
+
+def calibrate(calls=1000):
+    """
+    Measures the memory blocks a wrapper counts around a function that
+    allocates nothing, to discount them from the report
+    """
+    def nothing():
+        pass
+    wrapper = timed("calibration", nothing)
+    for _ in range(calls):
+        wrapper()
+    calls, _, _, allocated = phases.pop("calibration")
+    root_time[0] = 0
+    wrapper_blocks[0] = allocated / calls
+
+
+def instrument(owner, attribute, name, visits=None):
+    """
+    Replaces owner.attribute (a module function or a method) by its timed wrapper
+    """
+    function = owner.__dict__[attribute]
+    if not hasattr(function, "profiled"):
+        setattr(owner, attribute, timed(name, function, visits))
+
+
+def flip_visits(args):
+    evaluator, var = args
+    return evaluator.occ_offsets[var+1] - evaluator.occ_offsets[var]
+
+
+def enable(dump=None):
+    """
+    enable(dump) -> None
+
+    Instruments the phases of GWSAT, PAWS, weighted WalkSAT and the GA. With `dump`
+    the run is also profiled by cProfile and the statistics are written to
+    that file by report(). Only the current process is instrumented: the
+    workers of portfolio.py and island.py are not
+    """
+    global enabled, profile, profile_path
+    calibrate()
+    import ga
+    import gwsat
+    import localsearch
+    import paws
+    import population
+    import wwalksat
+
+    for owner, attribute, name in [
+            (gwsat, "restart", "gwsat: restart loop"),
+            (gwsat, "random_walk", "gwsat: random walk selection"),
+            (localsearch, "choose_and_flip", "gwsat: choose and flip selection"),
+            (paws, "best_moves", "paws: variable selection"),
+            (paws, "increase_weights", "paws: weight increase"),
+            (paws, "smooth_weights", "paws: weight smoothing"),
+            (wwalksat, "restart", "wwalksat: restart loop"),
+            (wwalksat, "random_walk", "wwalksat: random walk selection"),
+            (wwalksat, "greedy_flip", "wwalksat: greedy selection"),
+            (localsearch.FalsifiedSet, "random_clause", "local search: falsified clause pick"),
+            (localsearch.IncrementalEvaluator, "reset", "local search: full evaluation"),
+            (localsearch.WeightedEvaluator, "reset", "local search: full evaluation"),
+            (ga, "evolve_generation", "ga: generation"),
+            (ga, "evolve_generation_batch", "ga: generation"),
+            (ga, "evolve_generation_incremental", "ga: generation"),
+            (ga, "select_parents", "ga: selection"),
+            (ga, "generate_children", "ga: crossover"),
+            (ga, "mutate", "ga: mutation"),
+            (ga, "mutate_genotype", "ga: mutation"),
+            (ga, "calculate_fitness", "ga: fitness"),
+            (ga, "calculate_fitness_batch", "ga: fitness"),
+            (ga, "calculate_genotype_fitness_batch", "ga: fitness"),
+            (population.Population, "select", "ga: roulette search"),
+            (population.Population, "worst", "ga: worst individual"),
+            (population.Population, "replace", "ga: replacement"),
+            (population.ScoreIndex, "flip", "ga: mutation"),
+            (population.ScoreIndex, "segment", "ga: fitness"),
+            (population.ScoreIndex, "replace", "ga: replacement")]:
+        instrument(owner, attribute, name)
+    instrument(localsearch.IncrementalEvaluator, "flip", "local search: flip (clause re-evaluation)", flip_visits)
+    instrument(localsearch.WeightedEvaluator, "flip", "local search: flip (clause re-evaluation)", flip_visits)
+
+    enabled = True
+    profile_path = dump
+    if dump is not None:
+        profile = cProfile.Profile()
+        profile.enable()
+
+
+def report():
+    """
+    Prints the calls, time and net allocated memory blocks of every phase.
+    Self time excludes the nested phases; the share is relative to the time
+    of the outermost phases. Writes the cProfile statistics if requested
+    """
+    if profile is not None:
+        profile.disable()
+        profile.dump_stats(profile_path)
+        print("c cProfile statistics written to ", profile_path)
+        pstats.Stats(profile).sort_stats("cumulative").print_stats(15)
+
+    total = root_time[0] or 1
+    print("c Profile: phase | calls | total ms | self ms | self % | net blocks (inclusive)")
+    for name, (calls, inclusive, own, allocated) in sorted(phases.items(), key=lambda item: -item[1][2]):
+        if calls:
+            print("c {:<44} {:>10} {:>12.2f} {:>12.2f} {:>6.1f}% {:>10}".format(
+                name, calls, inclusive / 1e6, own / 1e6, 100 * own / total,
+                round(allocated - calls * wrapper_blocks[0])))
+    flips = phases.get("local search: flip (clause re-evaluation)", [0])[0]
+    if flips:
+        counters["flips"] = flips
+    scans = phases.get("ga: roulette search", [0])[0]
+    if scans:
+        counters["selection scans"] = scans
+    for name, value in sorted(counters.items()):
+        print("c Counter {:<36} {:>12}".format(name, value))
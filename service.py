@@ -0,0 +1,401 @@
+import argparse
+import asyncio
+import itertools
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import anytime
+import formulacache
+
+
+# Parsed formulas kept by every worker process, see load_database
+FORMULAS_PER_WORKER = 8
+# Seconds between two progress events of a running job
+PROGRESS_SECONDS = 0.5
+
+# State of a worker process, set once by init_worker
+worker_events = None
+worker_formulas = dict()
+
+
+def init_worker(events):
+    global worker_events
+    worker_events = events
+
+
+def load_database(filename, file_type, cache_dir=None):
+    """
+    load_database(filename, file_type, cache_dir) -> database, top_fitness
+
+    Loads a formula through the compiled formula cache (see formulacache.py)
+    and keeps it in the worker, so the jobs on the same instance that land on
+    this worker reuse it without reading the file again. The entries are
+    keyed by the size and modification time of the file, like the cache
+    """
+    key = (os.path.abspath(filename), file_type, formulacache.source_key(filename))
+    formula = worker_formulas.pop(key, None)
+    if formula is None:
+        formula = formulacache.load_formula(filename, file_type, cache_dir)
+        if len(worker_formulas) >= FORMULAS_PER_WORKER:
+            del worker_formulas[next(iter(worker_formulas))]
+    # Most recently used last
+    worker_formulas[key] = formula
+    return formula
+
+
+def new_solver(job):
+    """
+    new_solver(job) -> anytime solver for the job, label of its best value
+    """
+    algorithm = job["algorithm"]
+    backend = job.get("backend", "python")
+    seed = job.get("seed")
+    if algorithm == "ga":
+        database, _ = load_database(job["file"], "wcnf", job.get("cache_dir"))
+        solver = anytime.GASolver([list(chromosome) for chromosome in database], database.num_vars,
+                                  list(database.weights), job.get("operation", "two"), backend, seed,
+                                  job.get("batch", False))
+        return solver, "total fitness"
+    if algorithm == "wwalksat":
+        database, top_fitness = load_database(job["file"], "wcnf", job.get("cache_dir"))
+        return anytime.WeightedWalkSATSolver(database.num_vars, database, top_fitness, job.get("wp", 0.4),
+                                             backend=backend, seed=seed), "cost"
+    if algorithm == "gwsat":
+        database, _ = load_database(job["file"], "cnf", job.get("cache_dir"))
+        return anytime.GWSATSolver(database.num_vars, database, job.get("wp", 0.4), backend=backend, seed=seed,
+                                   tenure=job.get("tenure", 0)), "falsified clauses"
+    raise ValueError("unknown algorithm " + repr(algorithm))
+
+
+def run_job(job_id, job, time_budget, cancel):
+    """
+    run_job(job_id, job, time_budget, cancel) -> result message
+
+    Runs a job in a worker process: the anytime solver of its algorithm runs
+    until it solves the formula, spends `time_budget` seconds (the time left
+    before the deadline, None for no deadline) or `job["steps"]` steps, or
+    `cancel` is set. Progress events are sent to the service on the events
+    queue while it runs. A job that fails, even by calling exit(), ends with
+    an error message instead of stopping the worker
+    """
+    try:
+        return solve_job(job_id, job, time_budget, cancel)
+    except (Exception, SystemExit) as error:
+        return {"job": job_id, "event": "error", "error": repr(error)}
+
+
+def solve_job(job_id, job, time_budget, cancel):
+    """
+    solve_job(job_id, job, time_budget, cancel) -> result message, see run_job
+    """
+    try:
+        solver, label = new_solver(job)
+    except (OSError, ValueError, KeyError) as error:
+        return {"job": job_id, "event": "error", "error": str(error)}
+
+    event = None
+    status = "finished"
+    for event in solver.run(time_budget, job.get("steps"), sample_seconds=PROGRESS_SECONDS):
+        if event.finished:
+            break
+        worker_events.put({"job": job_id, "event": "progress", "elapsed": event.elapsed, "steps": event.steps,
+                           label: event.best, "rate": event.rate})
+        if cancel.is_set():
+            status = "cancelled"
+            break
+    if status == "finished" and time_budget is not None and event.elapsed >= time_budget:
+        status = "deadline"
+
+    best = solver.best()
+    message = {"job": job_id, "event": "result", "status": status, "elapsed": event.elapsed,
+               "steps": event.steps, label: event.best}
+    if job["algorithm"] == "ga":
+        message["chromosome"], message["fitness"] = best
+    else:
+        message["solved"] = event.best == 0
+        message["configuration"] = [bool(value) for value in best]
+    return message
+
+
+class Job:
+    """
+    Job(job_id, request, deadline, cancel)
+
+    A job of the service: the request of the client, the absolute deadline
+    (time.monotonic(), None without one), the manager Event that tells its
+    worker to stop, and the queue of the messages for the client that
+    submitted it
+    """
+
+    def __init__(self, job_id, request, deadline, cancel):
+        self.job_id = job_id
+        self.request = request
+        self.deadline = deadline
+        self.cancel = cancel
+        self.cancelled = False
+        self.messages = asyncio.Queue()
+
+
+class SolveService:
+    """
+    SolveService(workers=None)
+
+    Long-running solve service. Jobs are queued and handed to a process pool
+    whose workers stay alive between jobs, so a job pays neither the
+    interpreter startup nor the imports, and formulas already loaded by a
+    worker are reused (see load_database). At most `workers` jobs run at a
+    time, one per worker (one per core by default)
+    """
+
+    def __init__(self, workers=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.manager = multiprocessing.Manager()
+        self.events = self.manager.Queue()
+        self.executor = ProcessPoolExecutor(max_workers=self.workers, initializer=init_worker,
+                                            initargs=(self.events,))
+        self.queue = asyncio.Queue()
+        self.jobs = dict()
+        self.job_ids = itertools.count(1)
+        self.tasks = list()
+        # Futures of the jobs handed to the pool, cancelled by close()
+        self.futures = set()
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        self.tasks = [asyncio.create_task(self.dispatch()) for _ in range(self.workers)]
+        self.tasks.append(asyncio.create_task(self.forward_events(loop)))
+
+    async def close(self):
+        for task in self.tasks:
+            task.cancel()
+        for job in self.jobs.values():
+            job.cancel.set()
+        # Lets the forwarding thread return before the manager goes away
+        self.events.put(None)
+        # shutdown(cancel_futures=True) needs Python 3.9
+        for future in list(self.futures):
+            future.cancel()
+        self.executor.shutdown(wait=True)
+        self.manager.shutdown()
+
+    def submit(self, request):
+        """
+        submit(request) -> Job
+
+        Queues a job. The deadline, in seconds, counts from the submission,
+        so the time spent in the queue is part of it
+        """
+        deadline = request.get("deadline")
+        job = Job(next(self.job_ids), request, None if deadline is None else time.monotonic() + deadline,
+                  self.manager.Event())
+        self.jobs[job.job_id] = job
+        self.queue.put_nowait(job)
+        job.messages.put_nowait({"job": job.job_id, "event": "queued", "position": self.queue.qsize()})
+        return job
+
+    def cancel(self, job_id):
+        """
+        Cancels a queued or running job, returns False if it is unknown or already done
+        """
+        job = self.jobs.get(job_id)
+        if job is None:
+            return False
+        job.cancelled = True
+        try:
+            job.cancel.set()
+        except (OSError, EOFError):
+            # The manager is gone: the service was closed and its workers are stopped
+            pass
+        return True
+
+    def finish(self, job, message):
+        self.jobs.pop(job.job_id, None)
+        job.messages.put_nowait(message)
+
+    async def dispatch(self):
+        """
+        Hands the queued jobs to the pool, one at a time
+        """
+        while True:
+            job = await self.queue.get()
+            if job.cancelled:
+                self.finish(job, {"job": job.job_id, "event": "result", "status": "cancelled", "steps": 0})
+                continue
+            time_budget = None
+            if job.deadline is not None:
+                time_budget = job.deadline - time.monotonic()
+                if time_budget <= 0:
+                    self.finish(job, {"job": job.job_id, "event": "result", "status": "deadline", "steps": 0})
+                    continue
+            job.messages.put_nowait({"job": job.job_id, "event": "started"})
+            future = self.executor.submit(run_job, job.job_id, job.request, time_budget, job.cancel)
+            self.futures.add(future)
+            try:
+                message = await asyncio.wrap_future(future)
+            except asyncio.CancelledError:
+                raise
+            except BaseException as error:
+                # Whatever a job raises, SystemExit included, is reported to its client only
+                message = {"job": job.job_id, "event": "error", "error": repr(error)}
+            finally:
+                self.futures.discard(future)
+            self.finish(job, message)
+
+    async def forward_events(self, loop):
+        """
+        Moves the progress events of the workers to the queue of their job
+        """
+        while True:
+            message = await loop.run_in_executor(None, self.events.get)
+            if message is None:
+                return
+            job = self.jobs.get(message["job"])
+            if job is not None:
+                job.messages.put_nowait(message)
+
+    async def handle_client(self, reader, writer):
+        """
+        Serves a connection. The client writes one JSON object per line:
+
+            - {"op": "solve", "algorithm": "gwsat" | "wwalksat" | "ga", "file": path, "seed", "backend",
+               "deadline" (seconds), "steps", "wp", "tenure", "operation", "batch", "cache_dir"}
+            - {"op": "cancel", "job": id}
+
+        and receives JSON lines: queued, started, progress and result (or
+        error) events of its jobs, with their "job" id, and the answer to
+        every cancel. A job whose client disconnects is cancelled
+        """
+        lock = asyncio.Lock()
+        own_jobs = list()
+        streams = list()
+
+        async def send(message):
+            async with lock:
+                writer.write((json.dumps(message) + "\n").encode())
+                await writer.drain()
+
+        async def stream(job):
+            while True:
+                message = await job.messages.get()
+                await send(message)
+                if message["event"] in ("result", "error"):
+                    return
+
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    op = request.get("op")
+                except (ValueError, AttributeError):
+                    await send({"event": "error", "error": "expected a JSON object per line"})
+                    continue
+                if op == "solve":
+                    if "file" not in request or "algorithm" not in request:
+                        await send({"event": "error", "error": "solve needs an algorithm and a file"})
+                        continue
+                    job = self.submit(request)
+                    own_jobs.append(job.job_id)
+                    streams.append(asyncio.create_task(stream(job)))
+                elif op == "cancel":
+                    await send({"job": request.get("job"), "event": "cancel",
+                                "accepted": self.cancel(request.get("job"))})
+                else:
+                    await send({"event": "error", "error": "unknown op " + repr(op)})
+            # End of the requests: the results are still streamed
+            await asyncio.gather(*streams)
+        except (ConnectionError, asyncio.CancelledError):
+            for job_id in own_jobs:
+                self.cancel(job_id)
+            raise
+        finally:
+            writer.close()
+
+
+async def serve(socket_path=None, port=None, workers=None):
+    """
+    Runs the service on a Unix socket, or on localhost:port, until interrupted
+    """
+    service = SolveService(workers)
+    await service.start()
+    if socket_path is not None:
+        server = await asyncio.start_unix_server(service.handle_client, path=socket_path)
+        print("c Solve service listening on ", socket_path, " with ", service.workers, " workers")
+    else:
+        server = await asyncio.start_server(service.handle_client, "127.0.0.1", port)
+        print("c Solve service listening on 127.0.0.1:", port, " with ", service.workers, " workers")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.close()
+        if socket_path is not None and os.path.exists(socket_path):
+            os.remove(socket_path)
+
+
+async def submit(requests, socket_path=None, port=None):
+    """
+    submit(requests, socket_path, port) -> async generator of the messages of the service
+
+    Client side: sends the solve requests and yields every message until all
+    the jobs have a result
+    """
+    if socket_path is not None:
+        reader, writer = await asyncio.open_unix_connection(socket_path)
+    else:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    for request in requests:
+        writer.write((json.dumps(dict(request, op="solve")) + "\n").encode())
+    await writer.drain()
+    writer.write_eof()
+    pending = len(requests)
+    try:
+        while pending:
+            line = await reader.readline()
+            if not line:
+                break
+            message = json.loads(line)
+            if message["event"] in ("result", "error"):
+                pending -= 1
+            yield message
+    finally:
+        writer.close()
+
+
+async def print_messages(requests, socket_path=None, port=None):
+    async for message in submit(requests, socket_path, port):
+        print(json.dumps(message))
+
+
+if __name__ == '__main__':
+    """
+    Runs the solve service, or submits jobs to a running one with --submit
+    """
+    parser = argparse.ArgumentParser(description="Long-running solve service for GWSAT, weighted WalkSAT and GA")
+    parser.add_argument("--socket", default=None, help="path of the Unix socket of the service")
+    parser.add_argument("--port", type=int, default=None, help="localhost TCP port, if no --socket is given")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes, one per core by default")
+    parser.add_argument("--submit", nargs="+", default=None, metavar="FILE",
+                        help="submit a job per file to a running service and print its messages as JSON lines")
+    parser.add_argument("--algorithm", choices=["gwsat", "wwalksat", "ga"], default="gwsat",
+                        help="algorithm of the submitted jobs")
+    parser.add_argument("--seed", type=int, default=None, help="seed of the submitted jobs")
+    parser.add_argument("--deadline", type=float, default=None, help="deadline of every submitted job, in seconds")
+    parser.add_argument("--steps", type=int, default=None, help="step budget of every submitted job")
+    args = parser.parse_args()
+    if args.socket is None and args.port is None:
+        parser.error("--socket or --port is required")
+
+    try:
+        if args.submit:
+            jobs = [{"algorithm": args.algorithm, "file": os.path.abspath(filename), "seed": args.seed,
+                     "deadline": args.deadline, "steps": args.steps} for filename in args.submit]
+            asyncio.run(print_messages(jobs, args.socket, args.port))
+        else:
+            asyncio.run(serve(args.socket, args.port, args.workers))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,135 @@
+import time
+from array import array
+
+
+# Points kept by a Trajectory, plenty for the RTD plots
+DEFAULT_CAPACITY = 4096
+
+
+class Trajectory:
+    """
+    Trajectory(start, capacity=DEFAULT_CAPACITY, typecode="q")
+
+    Fixed-size record of a series with one value per step (the satisfied
+    clauses of every flip, the best cost so far...) and the time, from
+    `start` (a time.time()), of the steps it keeps. The values are integers,
+    or floats with typecode "d" (the walk probability of gwsat.AdaptiveNoise).
+
+    Every `stride`-th step is kept. Once `capacity` points are kept every
+    other one is dropped and the stride doubles, so the memory does not grow
+    with the number of steps and the points stay evenly spread over the
+    whole run. The clock is only read for the steps that are kept. The
+    number of steps (len), the minimum, the maximum and the last value are
+    exact
+    """
+
+    def __init__(self, start, capacity=DEFAULT_CAPACITY, typecode="q"):
+        self.start = start
+        self.capacity = capacity
+        self.steps = array("q")
+        self.times = array("d")
+        self.values = array(typecode)
+        self.stride = 1
+        self.count = 0
+        self.minimum = None
+        self.maximum = None
+        self.last = None
+        self.end = None
+
+    def __len__(self):
+        return self.count
+
+    def record(self, value):
+        """
+        Records the value of the next step
+        """
+        step = self.count
+        self.count = step + 1
+        self.last = value
+        if self.maximum is None:
+            self.minimum = self.maximum = value
+        elif value > self.maximum:
+            self.maximum = value
+        elif value < self.minimum:
+            self.minimum = value
+        if step % self.stride == 0:
+            self.keep(step, time.time() - self.start, value)
+
+    def keep(self, step, moment, value):
+        if len(self.steps) == self.capacity:
+            del self.steps[1::2]
+            del self.times[1::2]
+            del self.values[1::2]
+            self.stride *= 2
+            if step % self.stride:
+                return
+        self.steps.append(step)
+        self.times.append(moment)
+        self.values.append(value)
+
+    def finish(self):
+        """
+        Notes the time of the last step, so points() ends with it even if it was not kept
+        """
+        if self.count:
+            self.end = (self.count - 1, time.time() - self.start, self.last)
+
+    def points(self):
+        """
+        points() -> steps (from 1), times, values of the kept points
+        """
+        steps = [step + 1 for step in self.steps]
+        times = list(self.times)
+        values = list(self.values)
+        if self.end is not None and (not steps or self.end[0] + 1 > steps[-1]):
+            steps.append(self.end[0] + 1)
+            times.append(self.end[1])
+            values.append(self.end[2])
+        return steps, times, values
+
+    def state(self, name):
+        """
+        state(name) -> metadata, arrays of the trajectory for a checkpoint, see checkpoint.py
+        """
+        metadata = {name: [self.stride, self.count, self.minimum, self.maximum, self.last, self.end]}
+        return metadata, {name + "_steps": self.steps, name + "_times": self.times, name + "_values": self.values}
+
+    def load(self, name, metadata, arrays):
+        """
+        Loads a state(name) back into an empty trajectory
+        """
+        self.stride, self.count, self.minimum, self.maximum, self.last, self.end = metadata[name]
+        self.steps = arrays[name + "_steps"]
+        self.times = arrays[name + "_times"]
+        self.values = arrays[name + "_values"]
+
+
+def best_so_far(trajectories, start, capacity=DEFAULT_CAPACITY):
+    """
+    best_so_far(trajectories, start, capacity) -> Trajectory
+
+    Merges trajectories recorded at the same time (the restarts run by the
+    workers of portfolio.py) into one ordered by time holding the best value
+    seen by any of them up to that time. Every kept point stands for
+    `stride` steps of its trajectory, so the steps of the merged points count
+    the steps done by all of them
+    """
+    points = sorted((moment, value, trajectory.stride) for trajectory in trajectories
+                    for moment, value in zip(*trajectory.points()[1:]))
+    merged = Trajectory(start, capacity)
+    merged.stride = -(-len(points) // capacity) or 1
+    best = None
+    step = 0
+    for position, (moment, value, stride) in enumerate(points):
+        best = value if best is None else max(best, value)
+        if position % merged.stride == 0:
+            merged.steps.append(step)
+            merged.times.append(moment)
+            merged.values.append(best)
+        step += stride
+    merged.count = sum(len(trajectory) for trajectory in trajectories)
+    if points:
+        merged.minimum = merged.values[0]
+        merged.maximum = merged.last = max(trajectory.maximum for trajectory in trajectories if trajectory.count)
+        merged.end = (merged.count - 1, points[-1][0], best)
+    return merged
@@ -0,0 +1,151 @@
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+BACKENDS = ["python", "numpy"]
+
+
+def select_backend(backend):
+    """
+    select_backend(backend) -> "python" or "numpy"
+
+    Falls back to the pure python backend when NumPy is not installed
+    """
+    if backend == "numpy" and np is None:
+        print("c NumPy is not installed, using the python backend")
+        return "python"
+    return backend
+
+
+def load_backend(backend, database):
+    """
+    load_backend(backend, database) -> NumpyFormula or None
+
+    Returns the vectorized evaluator for the `numpy` backend, or None for the
+    pure python one
+    """
+    if select_backend(backend) == "numpy":
+        return NumpyFormula(database)
+    return None
+
+
+class NumpyFormula:
+    """
+    NumpyFormula(database)
+
+    Holds a clausedb.ClauseDatabase as a padded literal matrix so the formula
+    can be evaluated for an assignment without python loops:
+
+        - variables[clause, k]: index (var-1) of the k-th literal of the clause
+        - positive[clause, k]: True if that literal is not negated
+
+    Clauses shorter than the longest one are padded with a literal on an extra
+    variable (index num_vars) that is always false.
+    """
+
+    def __init__(self, database):
+        self.num_vars = database.num_vars
+        self.num_clauses = len(database)
+
+        literals = np.frombuffer(database.literals, dtype=np.int32) if len(database.literals) \
+            else np.zeros(0, dtype=np.int32)
+        offsets = np.asarray(database.offsets, dtype=np.int64)
+        lengths = np.diff(offsets)
+        width = int(lengths.max()) if self.num_clauses else 0
+
+        rows = np.repeat(np.arange(self.num_clauses), lengths)
+        columns = np.arange(len(literals)) - np.repeat(offsets[:-1], lengths)
+
+        self.variables = np.full((self.num_clauses, width), self.num_vars, dtype=np.int64)
+        self.positive = np.ones((self.num_clauses, width), dtype=bool)
+        self.variables[rows, columns] = np.abs(literals) - 1
+        self.positive[rows, columns] = literals > 0
+        self.mask = np.zeros((self.num_clauses, width), dtype=bool)
+        self.mask[rows, columns] = True
+
+    def as_matrix(self, assignments):
+        """
+        Converts one assignment or a list of them into a boolean array with the
+        extra always-false column used by the padding literals
+        """
+        values = np.asarray(assignments, dtype=bool)
+        padding = np.zeros(values.shape[:-1] + (1,), dtype=bool)
+        return np.concatenate((values, padding), axis=-1)
+
+    def true_literals(self, assignments):
+        """
+        Returns a boolean array [..., clause, k] telling which literals are true
+        """
+        values = self.as_matrix(assignments)
+        return (values[..., self.variables] == self.positive) & self.mask
+
+    def clause_counts(self, assignment):
+        """
+        clause_counts(assignment) -> array with the number of true literals per clause
+        """
+        return self.true_literals(assignment).sum(axis=-1)
+
+    def evaluate(self, assignment):
+        """
+        evaluate(assignment) -> true_count, make_count, break_count
+
+        Vectorized equivalent of the full evaluation done by
+        localsearch.IncrementalEvaluator.reset
+        """
+        true_literals = self.true_literals(assignment)
+        true_count = true_literals.sum(axis=-1)
+
+        falsified = true_count == 0
+        make_vars = self.variables[falsified][self.mask[falsified]] + 1
+        make_count = np.bincount(make_vars, minlength=self.num_vars + 1)[:self.num_vars + 1]
+
+        critical = true_count == 1
+        columns = true_literals[critical].argmax(axis=-1)
+        break_vars = self.variables[critical, columns] + 1
+        break_count = np.bincount(break_vars, minlength=self.num_vars + 1)[:self.num_vars + 1]
+
+        return true_count, make_count, break_count
+
+
+def chromosome_fitness(children, current_configuration):
+    """
+    chromosome_fitness(children, current_configuration) -> array of raw fitness values
+
+    Vectorized version of the gene loop of ga.calculate_fitness for several
+    children at once: a true gene adds its absolute value and a false gene
+    subtracts half of it
+    """
+    width = max(len(child) for child in children)
+    genes = np.zeros((len(children), width), dtype=np.int64)
+    for row, child in enumerate(children):
+        genes[row, :len(child)] = child
+
+    configuration = np.append(np.asarray(current_configuration, dtype=bool), False)
+    magnitude = np.abs(genes)
+    values = configuration[magnitude - 1]
+    satisfied = values == (genes > 0)
+    contribution = np.where(satisfied, magnitude, -(magnitude // 2))
+    return np.where(genes != 0, contribution, 0).sum(axis=-1)
+
+
+def genotype_fitness(children, genotypes):
+    """
+    genotype_fitness(children, genotypes) -> array of raw fitness values
+
+    Same as chromosome_fitness but every child brings the values of its own
+    genes (see ga.evolve_generation_batch), so the children of a whole
+    generation are scored with one padded matrix
+    """
+    width = max(len(child) for child in children)
+    genes = np.zeros((len(children), width), dtype=np.int64)
+    values = np.zeros((len(children), width), dtype=bool)
+    for row, (child, genotype) in enumerate(zip(children, genotypes)):
+        genes[row, :len(child)] = child
+        values[row, :len(genotype)] = np.frombuffer(bytes(genotype), dtype=np.uint8)
+
+    magnitude = np.abs(genes)
+    satisfied = values == (genes > 0)
+    contribution = np.where(satisfied, magnitude, -(magnitude // 2))
+    return np.where(genes != 0, contribution, 0).sum(axis=-1)
@@ -0,0 +1,128 @@
+import localsearch
+import clausedb
+import bitassign
+import vectorized
+import random
+import time
+from trajectory import Trajectory
+
+
+def solve(num_vars, clauses, top_weight, num_flips, wp, steps=50, backend="python", seed=None):
+    """
+    solve(num_vars, clauses, top_weight, num_flips, wp, steps, backend, seed)
+        -> cost_values, best_configuration, best_cost
+
+    Weighted WalkSAT for weighted MaxSAT (.wcnf): looks for the interpretation
+    that minimises the weight of the falsified clauses. `clauses` is a weighted
+    clausedb.ClauseDatabase (see dimacs.read_wcnf); clauses whose weight is
+    >= top_weight are hard, see localsearch.WeightedEvaluator.
+
+    Every flip is a random walk with probability `wp` and a greedy flip
+    otherwise, as in GWSAT, with the variables scored by weighted break/make.
+    `steps` restarts of `num_flips` flips are run; the search stops as soon as
+    every clause is satisfied. cost_values is a trajectory.Trajectory of the
+    best cost found so far at every flip (a falsified hard clause costs
+    hard_weight)
+    """
+    print("c Applying weighted WalkSAT")
+    database = clausedb.as_database(num_vars, clauses)
+    evaluator = localsearch.WeightedEvaluator(database, top_weight, vectorized.load_backend(backend, database))
+
+    cost_values = Trajectory(time.time())
+    best_configuration = None
+    best_cost = None
+
+    rng = random.Random(seed)
+    for current_step in range(steps):
+        current_configuration = localsearch.random_value_assignment(num_vars, rng)
+        evaluator.reset(current_configuration)
+        configuration, cost = restart(evaluator, num_flips, wp, cost_values, best_cost, rng)
+        if best_cost is None or cost < best_cost:
+            best_configuration, best_cost = configuration, cost
+        if best_cost == 0:
+            break
+    cost_values.finish()
+
+    hard_falsified = best_cost // evaluator.hard_weight
+    if hard_falsified:
+        print("u No configuration satisfies every hard clause in ", num_flips)
+        print("c Best configuration falsifies ", hard_falsified, " hard clauses")
+    else:
+        print("s Optimum found" if best_cost == 0 else "s Best cost found")
+        print("c Best configuration has cost ", best_cost, ": ", best_configuration)
+
+    return cost_values, best_configuration, best_cost
+
+
+def restart(evaluator, num_flips, wp, cost_values, best_cost=None, rng=random):
+    """
+    restart(evaluator, num_flips, wp, cost_values, best_cost, rng)
+        -> best_configuration, best_cost of the restart
+
+    Runs one restart of at most `num_flips` flips from the configuration
+    loaded in `evaluator`, recording in the trajectory.Trajectory cost_values
+    the best cost so far, including the `best_cost` of the previous restarts
+    """
+    best = bitassign.BestSoFar(evaluator.configuration, evaluator.num_sat_clauses)
+    restart_cost = evaluator.cost
+    overall_cost = restart_cost if best_cost is None else min(best_cost, restart_cost)
+    next_random = rng.random
+    evaluator.last_flipped = 0
+
+    for flip in range(num_flips):
+        if not evaluator.falsified.size:
+            break
+        if next_random() < wp:
+            random_walk(evaluator, rng)
+        else:
+            greedy_flip(evaluator, rng)
+
+        best.flipped(evaluator.last_flipped)
+        if evaluator.cost < restart_cost:
+            restart_cost = evaluator.cost
+            best.improved(evaluator.configuration, evaluator.num_sat_clauses)
+            if restart_cost < overall_cost:
+                overall_cost = restart_cost
+                print("c New best cost ", overall_cost, " at flip ", flip)
+        cost_values.record(overall_cost)
+
+    return best.best(), restart_cost
+
+
+def random_walk(evaluator, rng=random):
+    """
+    Flips a random variable of a falsified clause chosen uniformly at random
+    """
+    index = evaluator.falsified.random_clause(rng)
+    if index >= 0:
+        evaluator.flip(abs(rng.choice(evaluator.database.clause(index))))
+
+
+def greedy_flip(evaluator, rng=random):
+    """
+    Flips the variable of a random falsified clause with the best weighted
+    score (make - break), ties broken at random. Falsified hard clauses are
+    preferred, so the search first repairs the hard part of the formula
+    """
+    index = evaluator.falsified.random_clause(rng)
+    if index < 0:
+        return
+    if evaluator.hard_falsified and not evaluator.is_hard[index]:
+        # A few tries to land on a falsified hard clause
+        for _ in range(4):
+            other = evaluator.falsified.random_clause(rng)
+            if evaluator.is_hard[other]:
+                index = other
+                break
+
+    best_score = None
+    candidates = list()
+    for literal in evaluator.database.clause(index):
+        var = abs(literal)
+        score = evaluator.score(var)
+        if best_score is None or score > best_score:
+            best_score = score
+            candidates = [var]
+        elif score == best_score:
+            candidates.append(var)
+    evaluator.flip(rng.choice(candidates))